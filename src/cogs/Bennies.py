@@ -1,5 +1,9 @@
 from dotenv import load_dotenv
 from discord.ext import commands
+from models.AsyncModel import AsyncModel
+from models.BennyModel import BANK, Benny
+from models.EncounterCharModel import EncounterChar
+from typing import Union
 import discord
 import os
 
@@ -7,42 +11,14 @@ load_dotenv()
 
 DEFAULT_BENNY_POOL = int(os.environ["DEFAULT_BENNY_POOL"])
 MAIN_CHANNEL_ID = int(os.getenv("MAIN_CHANNEL_ID"))
-
-
-class BenniesData:
-    def __init__(self):
-        self.bennies = {"bank": DEFAULT_BENNY_POOL}
-
-    def get_bank_bennies(self):
-        return self.bennies["bank"]
-
-    def get_user_bennies(self, user_id):
-        return self.bennies.get(str(user_id), 0)
-
-    def give_benny(self, recipient_id, amount):
-        if amount <= 0:
-            raise ValueError("Amount must be greater than 0.")
-
-        if self.bennies["bank"] < amount:
-            raise ValueError("Insufficient bennies in the bank.")
-
-        recipient_bennies = self.get_user_bennies(recipient_id)
-        self.bennies["bank"] -= amount
-        self.bennies[str(recipient_id)] = recipient_bennies + amount
-
-    def use_benny(self, user_id):
-        user_bennies = self.get_user_bennies(user_id)
-        if user_bennies <= 0:
-            raise ValueError("You don't have any bennies to use.")
-
-        self.bennies["bank"] += 1
-        self.bennies[str(user_id)] = user_bennies - 1
+HISTORY_LIMIT = 25
 
 
 class Bennies(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.bennies_data = BenniesData()
+        self.bennies = AsyncModel(Benny(DEFAULT_BENNY_POOL))
+        self.encounter_char = AsyncModel(EncounterChar())
 
     async def cog_check(self, ctx):
         return (
@@ -75,7 +51,7 @@ class Bennies(commands.Cog):
         embed = discord.Embed(
             title="Current Benny Balance",
             color=discord.Color.green(),
-            description=f"**Bank bennies:** {self.bennies_data.get_bank_bennies()}",
+            description=f"**Bank bennies:** {await self.bennies.balance(ctx.guild.id, BANK)}",
         )
         await ctx.author.send(embed=embed)
 
@@ -91,7 +67,7 @@ class Bennies(commands.Cog):
         !bal
         """
 
-        user_bennies = self.bennies_data.get_user_bennies(ctx.author.id)
+        user_bennies = await self.bennies.balance(ctx.guild.id, ctx.author.id)
         embed = discord.Embed(
             title="Current Benny Balance",
             color=discord.Color.green(),
@@ -120,7 +96,7 @@ class Bennies(commands.Cog):
         """
 
         try:
-            self.bennies_data.give_benny(recipient.id, amount)
+            await self.bennies.give(ctx.guild.id, recipient.id, amount, ctx.author.id)
         except ValueError as e:
             await ctx.send(str(e))
             return
@@ -132,6 +108,111 @@ class Bennies(commands.Cog):
         )
         await ctx.send(embed=embed)
 
+    @commands.command(aliases=["gba"])
+    @commands.has_role("GameMaster")
+    async def give_bennies_all(
+        self,
+        ctx,
+        amount: int = commands.parameter(description="Amount of bennies each."),
+        targets: commands.Greedy[Union[discord.Role, discord.Member]] = commands.parameter(
+            description="Roles and players to give bennies to."
+        ),
+    ):
+        """
+        Description: Give bennies to every member of one or more roles and to any mentioned players at once.
+
+        Params:
+        !gba Amount @Role @Player ...
+
+        Example:
+        !gba 3 @Players
+        """
+
+        recipients = {}
+        for target in targets:
+            members = target.members if isinstance(target, discord.Role) else [target]
+            for member in members:
+                if not member.bot:
+                    recipients[member.id] = member.mention
+        await self.give_bulk(ctx, amount, list(recipients), recipients)
+
+    @commands.command(aliases=["gbe"])
+    @commands.has_role("GameMaster")
+    async def give_bennies_encounter(
+        self,
+        ctx,
+        amount: int = commands.parameter(description="Amount of bennies each."),
+        encounter_id: int = commands.parameter(description="ID of encounter."),
+    ):
+        """
+        Description: Give bennies to every character in an encounter at once.
+
+        Params:
+        !gbe Amount EncounterID
+
+        Example:
+        !gbe 3 1
+        """
+
+        encounter_name, characters = await self.encounter_char.read(encounter_id)
+        if encounter_name is None:
+            await ctx.send("Encounter not found.")
+            return
+
+        # One share per character, so a player running two characters gets two.
+        recipient_ids = [row[0] for row in characters]
+        names = {}
+        for row in characters:
+            names.setdefault(row[0], []).append(row[1])
+        mentions = {
+            user_id: f"<@{user_id}> ({', '.join(character_names)})"
+            for user_id, character_names in names.items()
+        }
+        await self.give_bulk(ctx, amount, recipient_ids, mentions, encounter_name)
+
+    @give_bennies_all.error
+    async def give_bennies_all_error(self, ctx, error):
+        if isinstance(error, (commands.MissingRequiredArgument, commands.BadArgument)):
+            await ctx.send(
+                "Please specify an amount and at least one role or player, e.g. `!gba 3 @Players`."
+            )
+
+    @give_bennies_encounter.error
+    async def give_bennies_encounter_error(self, ctx, error):
+        if isinstance(error, (commands.MissingRequiredArgument, commands.BadArgument)):
+            await ctx.send(
+                "Please specify an amount and an encounter ID, e.g. `!gbe 3 1`."
+            )
+
+    async def give_bulk(self, ctx, amount, recipient_ids, mentions, source=None):
+        try:
+            bank, given = await self.bennies.give_many(
+                ctx.guild.id, recipient_ids, amount, ctx.author.id
+            )
+        except ValueError as e:
+            await ctx.send(str(e))
+            return
+
+        lines = [
+            f"{mentions[user_id]}: +{total} (now {balance})"
+            for user_id, total, balance in given
+        ]
+        description = "\n".join(lines)
+        if len(description) > 4096:
+            description = description[:4093] + "..."
+
+        total = sum(total for _, total, _ in given)
+        title = f"Give {'Bennies' if total > 1 else 'Benny'}"
+        if source:
+            title += f" - {source}"
+        embed = discord.Embed(
+            title=title, color=discord.Color.green(), description=description
+        )
+        embed.set_footer(
+            text=f"{ctx.author.display_name} gave {total} in total. {bank} left in the bank."
+        )
+        await ctx.send(embed=embed)
+
     @commands.command(aliases=["ub"])
     async def use_benny(self, ctx):
         """
@@ -145,7 +226,7 @@ class Bennies(commands.Cog):
         """
 
         try:
-            self.bennies_data.use_benny(ctx.author.id)
+            await self.bennies.use(ctx.guild.id, ctx.author.id)
         except ValueError as e:
             await ctx.send(str(e))
             return
@@ -156,6 +237,81 @@ class Bennies(commands.Cog):
         )
         await ctx.send(embed=embed)
 
+    @commands.command(aliases=["bh"])
+    async def benny_history(
+        self,
+        ctx,
+        member: discord.Member = commands.parameter(
+            description="Whose bennies to show.", default=None
+        ),
+        limit: int = commands.parameter(
+            description="Number of events to show.", default=10
+        ),
+    ):
+        """
+        Description: Show the latest benny events of this campaign, for everyone or one player.
+
+        Params:
+        !bh @Player Limit
+
+        Example:
+        !bh @John 5
+        """
+
+        limit = max(1, min(limit, HISTORY_LIMIT))
+        user_id = member.id if member is not None else None
+        rows = await self.bennies.history(ctx.guild.id, user_id, limit)
+        if not rows:
+            await ctx.send("No bennies have changed hands in this campaign yet.")
+            return
+
+        lines = []
+        for event, user_id, amount, actor_id, created_at in rows:
+            plural = "bennies" if amount > 1 else "benny"
+            if event == "give":
+                action = f"<@{actor_id}> gave {amount} {plural} to <@{user_id}>"
+            else:
+                action = f"<@{user_id}> used {amount} {plural}"
+            lines.append(f"<t:{int(created_at)}:f> {action}")
+
+        campaign = await self.bennies.campaign(ctx.guild.id)
+        embed = discord.Embed(
+            title=f"Benny History - {campaign}",
+            color=discord.Color.green(),
+            description="\n".join(lines),
+        )
+        await ctx.send(embed=embed)
+
+    @commands.command()
+    @commands.has_role("GameMaster")
+    async def campaign(
+        self,
+        ctx,
+        *,
+        name=commands.parameter(description="Name of campaign.", default=None),
+    ):
+        """
+        Description: Show or switch the campaign whose bennies are in play. Each campaign has its own bank and balances.
+
+        Params:
+        !campaign NameOfCampaign
+
+        Example:
+        !campaign Deadlands
+        """
+
+        if name is None:
+            name = await self.bennies.campaign(ctx.guild.id)
+            description = f"The current campaign is **{name}**."
+        else:
+            await self.bennies.set_campaign(ctx.guild.id, name)
+            description = f"Bennies now belong to the campaign **{name}**."
+
+        embed = discord.Embed(
+            title="Campaign", color=discord.Color.blue(), description=description
+        )
+        await ctx.send(embed=embed)
+
 
 async def setup(bot):
     await bot.add_cog(Bennies(bot))
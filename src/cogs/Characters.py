@@ -1,6 +1,12 @@
 from discord.ext import commands
 from dotenv import load_dotenv
-from models.CharacterModel import Character
+from models.AsyncModel import AsyncModel
+from models.CharacterModel import (
+    Character,
+    CharacterNotFound,
+    parse_pairs,
+    parse_quantities,
+)
 import asyncio
 import discord
 import os
@@ -14,7 +20,7 @@ class Characters(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.players = {}
-        self.character = Character()
+        self.character = AsyncModel(Character())
 
     async def cog_check(self, ctx):
         return (
@@ -32,6 +38,27 @@ class Characters(commands.Cog):
         except discord.errors.Forbidden:
             pass  # Bot doesn't have the required permission to delete the message.
 
+    def character_embed(self, character):
+        embed = discord.Embed(
+            title=f"Character **{character.name}**", color=discord.Color.green()
+        )
+        embed.add_field(name="Health", value=str(character.health), inline=False)
+        embed.add_field(
+            name="Attributes",
+            value="\n".join(character.attribute_lines()),
+            inline=False,
+        )
+        embed.add_field(
+            name="Skills", value="\n".join(character.skill_lines()), inline=False
+        )
+        embed.add_field(
+            name="Equipment",
+            value="\n".join(character.equipment_lines()),
+            inline=False,
+        )
+        embed.add_field(name="Money", value=str(character.money), inline=False)
+        return embed
+
     @commands.command(aliases=["create"])
     async def create_character(
         self,
@@ -76,7 +103,7 @@ class Characters(commands.Cog):
         money = 0
 
         player_id = str(ctx.author.id)
-        existing_character = self.character.read(player_id, character_name)
+        existing_character = await self.character.read(player_id, character_name)
 
         if existing_character:
             await ctx.send(
@@ -84,19 +111,18 @@ class Characters(commands.Cog):
             )
             return
 
-        attributes_string = attributes.replace(",", ", ")
-        skills_string = skills.replace(",", ", ")
-
-        character = (
-            player_id,
-            character_name,
-            health,
-            attributes_string,
-            skills_string,
-            equipment,
-            money,
+        character = (player_id, character_name, health, money)
+        created = await self.character.insert(
+            character,
+            parse_pairs(attributes),
+            parse_pairs(skills),
+            parse_quantities(equipment),
         )
-        self.character.insert(character)
+        if not created:
+            await ctx.send(
+                f"A character with the name **{character_name}** already exists."
+            )
+            return
 
         await ctx.send(f"Character **{character_name}** created successfully.")
 
@@ -120,7 +146,7 @@ class Characters(commands.Cog):
 
         player_id = str(ctx.author.id)
 
-        character = self.character.read(player_id, character_name)
+        character = await self.character.read(player_id, character_name)
 
         if not character:
             await ctx.send(f"Character **{character_name}** not found.")
@@ -128,67 +154,25 @@ class Characters(commands.Cog):
 
         updates = dict(token.split("=") for token in kwargs.split())
 
-        current_health = character[2]
-        current_attributes = character[3]
-        current_skills = character[4]
-        current_equipment = character[5]
-        current_money = character[6]
-
-        attributes = updates.get("attributes", current_attributes)
-        skills = updates.get("skills", current_skills)
-        equipment = updates.get("equipment", current_equipment)
-        money = int(updates.get("money", current_money))
-        health = int(updates.get("health", current_health))
-
-        if attributes != current_attributes and attributes:
-            existing_attributes = dict(
-                attr.split(":") for attr in current_attributes.split(",")
-            )
-            updated_attributes = dict(attr.split(":") for attr in attributes.split(","))
-            merged_attributes = {**existing_attributes, **updated_attributes}
-            attributes = ",".join(
-                [f"{attr}:{value}" for attr, value in merged_attributes.items()]
-            )
-        elif not current_attributes:
-            attributes = updates.get("attributes", "")
+        money = int(updates.get("money", character.money))
+        health = int(updates.get("health", character.health))
 
-        if skills != current_skills and skills:
-            existing_skills = dict(
-                skill.split(":") for skill in current_skills.split(",")
-            )
-            updated_skills = dict(skill.split(":") for skill in skills.split(","))
-            merged_skills = {**existing_skills, **updated_skills}
-            skills = ",".join(
-                [f"{skill}:{value}" for skill, value in merged_skills.items()]
-            )
-        elif not current_skills:
-            skills = updates.get("skills", "")
-
-        if equipment:
-            existing_equipment = {}
-            if current_equipment:
-                existing_equipment = dict(
-                    item.split(":") for item in current_equipment.split(",")
-                )
-
-            for item_update in equipment.split(","):
-                item_name, item_quantity = item_update.split(":")
-                item_quantity = int(item_quantity)
-
-                if item_quantity <= 0:
-                    existing_equipment.pop(item_name, None)
-                else:
-                    existing_equipment[item_name] = str(item_quantity)
-
-            equipment = ",".join(
-                [f"{item}:{quantity}" for item, quantity in existing_equipment.items()]
+        # Only the entries named in the update are upserted; everything else
+        # on the sheet is left untouched. Equipment amounts of 0 remove items.
+        try:
+            await self.character.update(
+                player_id,
+                character_name,
+                health,
+                money,
+                parse_pairs(updates.get("attributes")),
+                parse_pairs(updates.get("skills")),
+                parse_quantities(updates.get("equipment")),
             )
-        elif not current_equipment:
-            equipment = updates.get("equipment", "")
-
-        updated_character = (health, attributes, skills, equipment, money)
-
-        self.character.update(player_id, character_name, updated_character)
+        except CharacterNotFound:
+            # Deleted between the read above and this update.
+            await ctx.send(f"Character **{character_name}** not found.")
+            return
 
         await ctx.send(f"Character **{character_name}** updated successfully.")
 
@@ -216,39 +200,13 @@ class Characters(commands.Cog):
         else:
             player_id = player.id
 
-        character = self.character.read(player_id, character_name)
+        character = await self.character.read(player_id, character_name)
 
         if character is None:
             await ctx.author.send("Player doesn't have any characters yet.")
             return
 
-        item_counts = {}
-        if character[5]:
-            items = character[5].split(",")
-            for item in items:
-                item = item.strip()
-                item_name, count = item.split(":")
-                item_counts[item_name] = int(count)
-
-        item_lines = []
-        for item, count in item_counts.items():
-            if count > 1:
-                item_lines.append(f"{item} (x{count})")
-            else:
-                item_lines.append(item)
-
-        embed = discord.Embed(
-            title=f"Character **{character[1]}**", color=discord.Color.green()
-        )
-        embed.add_field(name="Health", value=str(character[2]), inline=False)
-        embed.add_field(
-            name="Attributes", value=character[3].replace(",", "\n"), inline=False
-        )
-        embed.add_field(
-            name="Skills", value=character[4].replace(",", "\n"), inline=False
-        )
-        embed.add_field(name="Equipment", value="\n".join(item_lines), inline=False)
-        embed.add_field(name="Money", value=str(character[6]), inline=False)
+        embed = self.character_embed(character)
 
         await ctx.send(embed=embed)
 
@@ -276,39 +234,13 @@ class Characters(commands.Cog):
         else:
             player_id = player.id
 
-        character = self.character.read(player_id, character_name)
+        character = await self.character.read(player_id, character_name)
 
         if character is None:
             await ctx.author.send("Character not found.")
             return
 
-        item_counts = {}
-        if character[5]:
-            items = character[5].split(",")
-            for item in items:
-                item = item.strip()
-                item_name, count = item.split(":")
-                item_counts[item_name] = int(count)
-
-        item_lines = []
-        for item, count in item_counts.items():
-            if count > 1:
-                item_lines.append(f"{item} (x{count})")
-            else:
-                item_lines.append(item)
-
-        embed = discord.Embed(
-            title=f"Character **{character[1]}**", color=discord.Color.green()
-        )
-        embed.add_field(name="Health", value=str(character[2]), inline=False)
-        embed.add_field(
-            name="Attributes", value=character[3].replace(",", "\n"), inline=False
-        )
-        embed.add_field(
-            name="Skills", value=character[4].replace(",", "\n"), inline=False
-        )
-        embed.add_field(name="Equipment", value="\n".join(item_lines), inline=False)
-        embed.add_field(name="Money", value=str(character[6]), inline=False)
+        embed = self.character_embed(character)
 
         await ctx.author.send(embed=embed)
 
@@ -335,42 +267,14 @@ class Characters(commands.Cog):
         else:
             player_id = player.id
 
-        characters = self.character.read_all(player_id)
+        characters = await self.character.read_all(player_id)
 
         if not characters:
             await ctx.author.send("You don't have any characters yet.")
             return
 
         for character in characters:
-            item_counts = {}
-            if character[5]:
-                items = character[5].split(",")
-                for item in items:
-                    item = item.strip()
-                    item_name, count = item.split(":")
-                    item_counts[item_name] = int(count)
-
-            item_lines = []
-            for item, count in item_counts.items():
-                if count > 1:
-                    item_lines.append(f"{item} (x{count})")
-                else:
-                    item_lines.append(item)
-
-            embed = discord.Embed(
-                title=f"Character **{character[1]}**", color=discord.Color.green()
-            )
-            embed.add_field(name="Health", value=str(character[2]), inline=False)
-            embed.add_field(
-                name="Attributes",
-                value=character[3].replace(",", "\n"),
-                inline=False,
-            )
-            embed.add_field(
-                name="Skills", value=character[4].replace(",", "\n"), inline=False
-            )
-            embed.add_field(name="Equipment", value="\n".join(item_lines), inline=False)
-            embed.add_field(name="Money", value=str(character[6]), inline=False)
+            embed = self.character_embed(character)
 
             await ctx.author.send(embed=embed)
 
@@ -398,13 +302,13 @@ class Characters(commands.Cog):
         else:
             player_id = player.id
 
-        character = self.character.read(player_id, character_name)
+        character = await self.character.read(player_id, character_name)
 
         if not character:
             await ctx.send(f"Character **{character_name}** not found.")
             return
 
-        self.character.delete(player_id, character_name)
+        await self.character.delete(player_id, character_name)
 
         await ctx.send(f"Character **{character_name}** deleted successfully.")
 
@@ -1,125 +1,132 @@
 from dotenv import load_dotenv
 from discord.ext import commands
+from game.Deck import MAX_DECKS, card_name
+from game.RandomStreams import RandomService
+from game.Sessions import SessionRegistry
+from models.AsyncModel import AsyncModel
 from models.EncounterModel import Encounter
+from models.InitiativeLogModel import InitiativeLog
+import asyncio
 import discord
+import json
+import logging
 import os
-import random
+import time
 
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
 MAIN_CHANNEL_ID = int(os.getenv("MAIN_CHANNEL_ID"))
-NO_MORE_CARDS = "No more cards"
-
-
-class Player:
-    def __init__(self, name, health, monster=False):
-        self.name = name
-        self.health = health
-        self.monster = monster
-        self.cards = []
-        self.card_values = []
-
-    def get_cards(self):
-        return ", ".join(self.cards)
-
-    def deal_card(self, card, card_value):
-        self.cards.append(card)
-        self.card_values.append(card_value)
-
-
-class Deck:
-    def __init__(self):
-        self.ranks = [
-            "Joker",
-            "Ace",
-            "King",
-            "Queen",
-            "Jack",
-            "10",
-            "9",
-            "8",
-            "7",
-            "6",
-            "5",
-            "4",
-            "3",
-            "2",
-        ]
-        self.ranks_value = {
-            "Joker": 15,
-            "Ace": 14,
-            "King": 13,
-            "Queen": 12,
-            "Jack": 11,
-            "10": 10,
-            "9": 9,
-            "8": 8,
-            "7": 7,
-            "6": 6,
-            "5": 5,
-            "4": 4,
-            "3": 3,
-            "2": 2,
-        }
-        self.suits = ["Spades", "Hearts", "Diamonds", "Clubs"]
-        self.suits_value = {"Spades": 4, "Hearts": 3, "Diamonds": 2, "Clubs": 1}
-        self.cards = []
-        self.remaining = 0
-        self.user_cards = {}
-        self.create_deck()
-
-    def create_deck(self):
-        self.cards = []
-        for rank in self.ranks:
-            if rank == "Joker":
-                self.cards.extend([rank, rank])  # Add two Joker cards
-            else:
-                for suit in self.suits:
-                    self.cards.append(f"{rank} of {suit}")
-        self.remaining = len(self.cards)
-        random.shuffle(self.cards)
-
-    def deal_card(self, player):
-        if not self.cards:
-            raise NoMoreCardsError("No more cards in the deck.")
-
-        self.remaining -= 1
-        card = self.cards.pop(0)
-        card_value = self.get_card_value(card)
-        player.deal_card(card, card_value)
-
-    def reset_deck(self):
-        self.create_deck()
-        self.user_cards = {}
-        for player in self.players:
-            player.cards = []
-            player.card_values = []
-
-    def get_card_value(self, card):
-        if card == "Joker":
-            return (5, 15)  # Joker is the highest value card.
-
-        rank, suit = card.split(" of ")
-        return (self.suits_value[suit], self.ranks_value[rank])
-
-
-class NoMoreCardsError(Exception):
-    """Raised when there are no more cards in the deck."""
-
-    pass
+# Channels that may run initiative, each with its own session. Unset keeps
+# initiative in the main channel; list more channels to open them up.
+INITIATIVE_CHANNEL_IDS = set(json.loads(os.getenv("INITIATIVE_CHANNEL_IDS") or "[]")) or {MAIN_CHANNEL_ID}
+TRACKER_EDIT_SECONDS = 1.0  # Discord allows about five edits per 5 s per channel.
+
+
+class LiveTracker:
+    """
+    The one pinned initiative message of a session, edited in place.
+
+    refresh() only marks the tracker dirty: every request made while an edit
+    is pending is folded into it, and edits are spaced at least
+    TRACKER_EDIT_SECONDS apart, however fast the GM presses !n.
+    """
+
+    def __init__(self, channel, render, on_post=None, message=None):
+        self.channel = channel
+        self.render = render
+        self.on_post = on_post  # Called with every newly posted message.
+        self.message = message
+        self.last_edit = 0.0
+        self.pending = None
+        self.lock = asyncio.Lock()  # One publish at a time, so only one message is posted.
+
+    def refresh(self):
+        if self.pending is None:
+            self.pending = asyncio.ensure_future(self._flush())
+            self.pending.add_done_callback(self._flushed)
+
+    def _flushed(self, task):
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            log.error("Could not update the initiative tracker", exc_info=error)
+
+    async def _flush(self):
+        delay = self.last_edit + TRACKER_EDIT_SECONDS - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        async with self.lock:
+            # Requests from here on need a fresh render, so they schedule
+            # another edit, which waits for this one to finish.
+            self.pending = None
+            self.last_edit = time.monotonic()
+            await self.publish()
+
+    async def publish(self):
+        embed = self.render()
+        if self.message is not None:
+            try:
+                await self.message.edit(embed=embed)
+                return
+            except discord.errors.NotFound:
+                self.message = None  # Someone deleted it, post a new one.
+
+        self.message = await self.channel.send(embed=embed)
+        if self.on_post is not None:
+            self.on_post(self.message)
+        try:
+            await self.message.pin()
+        except discord.errors.HTTPException:
+            pass  # Missing permission or too many pins; the message still works.
+
+    async def close(self):
+        if self.pending is not None:
+            self.pending.cancel()
+            self.pending = None
+        async with self.lock:
+            if self.message is not None:
+                await self.publish()
+                try:
+                    await self.message.unpin()
+                except discord.errors.HTTPException:
+                    pass
 
 
 class DeckOfCards(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.deck = Deck()
-        self.current_turn = 0
-        self.initiative_order = []
-        self.encounter = Encounter()
+        self.streams = RandomService.get()
+        self.initiative = AsyncModel(InitiativeLog())
+        self.sessions = SessionRegistry(self.deck_stream, self.initiative.model)
+        self.encounter = AsyncModel(Encounter())
+
+    def deck_stream(self, key):
+        guild_id, channel_id = key
+        return self.streams.stream(f"deck:{guild_id}:{channel_id}")
+
+    async def session(self, ctx):
+        # Sessions are restored from swade.db the first time they are touched.
+        session = self.sessions.get(ctx.guild.id, ctx.channel.id)
+        if session.restoring is None:
+            session.restoring = asyncio.ensure_future(self.restore(session))
+        await session.restoring
+        return session
+
+    async def restore(self, session):
+        try:
+            snapshot, events = await self.initiative.read(*session.key)
+        except Exception:
+            session.restoring = None  # Try again on the next command.
+            raise
+        session.restore(snapshot, events)
 
     async def cog_check(self, ctx):
         return (
-            ctx.channel.id == MAIN_CHANNEL_ID
+            ctx.guild is not None
+            and ctx.channel.id in INITIATIVE_CHANNEL_IDS
             and ctx.guild.me.guild_permissions.manage_messages
         )
 
@@ -147,33 +154,25 @@ class DeckOfCards(commands.Cog):
         !init 1
         """
 
-        # Look up the characters and monsters for the given encounter.
-        characters_data, monsters_data = self.encounter.initiative(encounter_id)
-
-        # Create Player objects for characters and monsters.
-        characters = [Player(row[0], row[1]) for row in characters_data]
-        monsters = [Player(row[0], row[1], monster=True) for row in monsters_data]
+        session = await self.session(ctx)
 
-        # Add characters and monsters to the deck's list of players.
-        self.deck.players = characters + monsters
+        # Look up the characters and monsters for the given encounter.
+        combatants = await self.encounter.initiative(encounter_id)
 
-        # Deal cards to each player.
-        for player in self.deck.players:
-            try:
-                self.deck.deal_card(player)
-            except Exception as e:
-                await ctx.send(str(e))
+        # Add a Player for every combatant to the deck's list of players.
+        players = [[row[0], row[1], bool(row[2]), row[3]] for row in combatants]
+        session.start(encounter_id, players)
 
-        # Sort the initiative order by card value.
-        self.deck.players.sort(key=lambda player: player.card_values[-1], reverse=True)
+        # Deal cards to each player; each deal moves them into their place.
+        # The shoe reshuffles or grows as needed, so this never runs out.
+        for player in list(session.players):
+            session.deal(player)
 
-        # Send the initiative order as an embed.
-        embed = self.create_initiative_embed()
-        await ctx.send(embed=embed)
+        # The order is already sorted by card value, so start from the top.
+        session.sort()
 
-        # Send the current player embed
-        current_player_embed = self.create_current_player_embed(self.deck.players[0])
-        await ctx.send(embed=current_player_embed)
+        # Show the order in the session's live tracker message.
+        self.refresh_tracker(ctx, session)
 
     @commands.command(aliases=["ei", "end"])
     @commands.has_role("GameMaster")
@@ -189,12 +188,17 @@ class DeckOfCards(commands.Cog):
         """
 
         try:
-            self.initiative_order = []
-            self.current_turn = 0  # Reset current turn
-            self.deck.reset_deck()
+            session = await self.session(ctx)
+            if session.tracker is not None:
+                # Leave the final order in the (now unpinned) tracker message.
+                tracker, session.tracker = session.tracker, None
+                await tracker.close()
+            session.tracker_message_id = None
+            session.reset()
 
             await self.send_embed(
                 ctx,
+                session,
                 "Encounter Ended",
                 "The Encounter has ended and the deck has been reset to a full deck.",
                 discord.Color.blue(),
@@ -210,20 +214,66 @@ class DeckOfCards(commands.Cog):
         player_name=commands.parameter(description="Player", default=None),
     ):
         """Deal a card to the specified player."""
-        player = next(
-            (player for player in self.deck.players if player.name == player_name), None
-        )
+        session = await self.session(ctx)
+        player = session.find(player_name)
         if player:
             try:
-                self.deck.deal_card(player)
+                session.deal(player)
                 await ctx.send(f"A card was dealt to {player.name}.")
-            except NoMoreCardsError as e:
-                await ctx.send(f"No more cards: {str(e)}")
+                self.refresh_tracker(ctx, session)
             except Exception as e:
                 await ctx.send(f"An error occurred: {str(e)}")
         else:
             await ctx.send("Player not found.")
 
+    @commands.command()
+    @commands.has_role("GameMaster")
+    async def shoe(
+        self,
+        ctx,
+        decks=commands.parameter(description="Number of decks.", default=None),
+    ):
+        """
+        Description: Show or set how many decks the initiative shoe holds. Setting it reshuffles a fresh shoe.
+
+        Params:
+        !shoe NumberOfDecks
+
+        Example:
+        !shoe 2
+        """
+
+        session = await self.session(ctx)
+        if decks is None:
+            await self.send_embed(
+                ctx,
+                session,
+                "Shoe",
+                f"The shoe holds {session.deck.decks} deck(s).",
+                discord.Color.blue(),
+            )
+            return
+
+        try:
+            decks = int(decks)
+        except ValueError:
+            await ctx.send("The number of decks must be a number.")
+            return
+        if not 1 <= decks <= MAX_DECKS:
+            await ctx.send(f"The shoe can hold between 1 and {MAX_DECKS} decks.")
+            return
+
+        session.set_shoe(decks)
+        if session.tracker is not None:
+            session.tracker.refresh()
+        await self.send_embed(
+            ctx,
+            session,
+            "Shoe",
+            f"The shoe now holds {decks} deck(s) and has been reshuffled.",
+            discord.Color.blue(),
+        )
+
     @commands.command(aliases=["vpc"])
     @commands.has_role("GameMaster")
     async def view_player_cards(
@@ -241,9 +291,8 @@ class DeckOfCards(commands.Cog):
         !vpc John
         """
 
-        player = next(
-            (player for player in self.deck.players if player.name == player_name), None
-        )
+        session = await self.session(ctx)
+        player = session.find(player_name)
         if player:
             cards = player.get_cards()
             await ctx.author.send(f"{player.name}'s cards: {cards}")
@@ -266,9 +315,8 @@ class DeckOfCards(commands.Cog):
         !rh John
         """
 
-        player = next(
-            (player for player in self.deck.players if player.name == player_name), None
-        )
+        session = await self.session(ctx)
+        player = session.find(player_name)
         if player:
             cards = player.get_cards()
             await ctx.send(f"{player.name} reveals their hand: {cards}")
@@ -288,34 +336,72 @@ class DeckOfCards(commands.Cog):
         !n
         """
 
-        self.current_turn = (self.current_turn + 1) % len(self.deck.players)
+        session = await self.session(ctx)
+        if not session.players:
+            await ctx.send("No initiative has been dealt in this channel.")
+            return
 
-        # Send the current player embed
-        current_player = self.deck.players[self.current_turn]
-        current_player_embed = self.create_current_player_embed(current_player)
-        await ctx.send(embed=current_player_embed)
+        session.advance()
+        self.refresh_tracker(ctx, session)
 
-    def create_current_player_embed(self, player):
-        color = discord.Color.red() if player.monster else discord.Color.green()
-        embed = discord.Embed(title="Current Player", color=color)
-        embed.add_field(
-            name=f"{player.name}'s Turn",
-            value=f"Health: {player.health}",
-            inline=False,
-        )
-        return embed
+    @commands.Cog.listener()
+    async def on_tokens_changed(self, guild_id, channel_id):
+        session = self.sessions.peek(guild_id, channel_id)
+        if session is not None and session.tracker is not None:
+            session.tracker.refresh()
+
+    def refresh_tracker(self, ctx, session):
+        if session.tracker is None:
+            # After a restart, keep editing the message pinned before it.
+            message = None
+            if session.tracker_message_id is not None:
+                message = ctx.channel.get_partial_message(session.tracker_message_id)
+            session.tracker = LiveTracker(
+                ctx.channel,
+                lambda: self.create_initiative_embed(session),
+                lambda message: session.set_tracker_message(message.id),
+                message,
+            )
+        session.tracker.refresh()
+
+    def player_tokens(self, player):
+        tokens = self.bot.get_cog("Tokens") if self.bot else None
+        if tokens is None or player.monster or player.id not in tokens.players:
+            return []
+        return tokens.players[player.id].tokens
 
-    async def send_embed(self, ctx, title, description, color=discord.Color.green()):
+    async def send_embed(
+        self, ctx, session, title, description, color=discord.Color.green()
+    ):
         embed = discord.Embed(title=title, color=color, description=description)
-        embed.set_footer(text=f"{self.deck.remaining} cards remaining in the deck")
+        embed.set_footer(text=f"{session.deck.remaining} cards remaining in the deck")
         await ctx.send(embed=embed)
 
-    def create_initiative_embed(self):
-        embed = discord.Embed(title="Initiative Order", color=discord.Color.blue())
-        for i, player in enumerate(self.deck.players, start=1):
-            name = f"{i}. {player.name}"
-            embed.add_field(name=name, value=player.cards[-1], inline=False)
-        embed.set_footer(text=f"{len(self.deck.cards)} cards remaining in the deck")
+    def create_initiative_embed(self, session):
+        current = session.current_player
+        color = discord.Color.blue()
+        if current is not None:
+            color = discord.Color.red() if current.monster else discord.Color.green()
+
+        lines = []
+        for i, player in enumerate(session.players, start=1):
+            card = card_name(player.cards[-1]) if player.cards else "No card"
+            line = f"{i}. **{player.name}** - {card} - Health: {player.health}"
+            tokens = self.player_tokens(player)
+            if tokens:
+                line += f" - {', '.join(tokens)}"
+            lines.append(f"▶ {line}" if player is current else line)
+
+        description = "\n".join(lines) or "No combatants."
+        if len(description) > 4096:
+            description = description[:4093] + "..."
+
+        embed = discord.Embed(
+            title="Initiative Order", color=color, description=description
+        )
+        if current is not None:
+            embed.add_field(name="Current Turn", value=current.name, inline=False)
+        embed.set_footer(text=f"{session.deck.remaining} cards remaining in the deck")
         return embed
 
 
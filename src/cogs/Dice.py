@@ -1,5 +1,12 @@
+from collections import deque
 from dotenv import load_dotenv
-from discord.ext import commands
+from discord.ext import commands, tasks
+from game.DiceEngine import DiceSyntaxError, compile_rolls
+from game.Probability import DEFAULT_TN, roll_spec
+from game.Probability import odds as exact_odds
+from game.RandomStreams import RandomService
+from models.AsyncModel import AsyncModel
+from models.RollHistoryModel import FLUSH_SIZE, RollHistory
 import discord
 import os
 import random
@@ -8,8 +15,9 @@ import re
 load_dotenv()
 
 MAIN_CHANNEL_ID = int(os.getenv("MAIN_CHANNEL_ID"))
-DICE_RE = re.compile(r"(\d+)d(\d+)")
-MODIFIER_RE = re.compile(r"([-+])(\d+)")
+ACTIONS_RE = re.compile(r"x(\d+)", re.IGNORECASE)
+HISTORY_SIZE = 20
+HISTORY_FLUSH_SECONDS = 10
 
 
 class InvalidDiceRoll(commands.CommandError):
@@ -19,6 +27,27 @@ class InvalidDiceRoll(commands.CommandError):
 class Dice(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.streams = RandomService.get()
+        self.roll_history = AsyncModel(RollHistory())
+        self.recent = {}
+        self.loaded = set()  # Channels whose recent rolls were read from swade.db.
+
+    async def cog_load(self):
+        self.flush_history.start()
+
+    async def cog_unload(self):
+        self.flush_history.cancel()
+        await self.roll_history.flush()
+
+    @tasks.loop(seconds=HISTORY_FLUSH_SECONDS)
+    async def flush_history(self):
+        await self.roll_history.flush()
+
+    def record_rolls(self, ctx, results):
+        recent = self.recent.setdefault(ctx.channel.id, deque(maxlen=HISTORY_SIZE))
+        for result in results:
+            entry = self.roll_history.model.record(ctx.author.id, ctx.channel.id, result)
+            recent.append((entry[0], entry[2], entry[4], entry[5]))
 
     async def cog_check(self, ctx):
         return (
@@ -35,56 +64,34 @@ class Dice(commands.Cog):
         except discord.errors.Forbidden:
             pass  # Bot doesn't have the required permission to delete the message.
 
-    def dice_roll(self, dice: int, sides: int) -> int:
-        if dice <= 0:
-            raise InvalidDiceRoll("Dice must be greater than 0")
-        if sides <= 0:
-            raise InvalidDiceRoll("Sides must be greater than 0")
-        if dice > 10:
-            raise InvalidDiceRoll("Cannot roll more than 10 dice at once")
-        if sides > 100:
-            raise InvalidDiceRoll("Dice faces cannot exceed 100")
-
-        roll = [random.randint(1, sides) for _ in range(dice)]
-        return sum(roll)
-
-    def roll_dice(self, dice_matches: re.Match) -> tuple:
-        rolls = []
-        total = 0
-
-        for dice_match in dice_matches:
-            num_dice = int(dice_match[0])
-            num_faces = int(dice_match[1])
-            dice_result = self.dice_roll(num_dice, num_faces)
-            rolls.append(f"{num_dice}d{num_faces} ({dice_result})")
-            total += dice_result
-
-        return rolls, total
-
-    def calculate_total_with_modifiers(
-        self, total: int, modifier_matches: re.Match
-    ) -> int:
-        for operator, value in modifier_matches:
-            value = int(value)
-            if operator == "+":
-                total += value
-            elif operator == "-":
-                total -= value
-            else:
-                raise InvalidDiceRoll(f"Invalid operator: {operator}")
+    def roll_dice(self, cmd: str, rng=random) -> list:
+        try:
+            rolls = compile_rolls(cmd)
+        except DiceSyntaxError as e:
+            raise InvalidDiceRoll(str(e))
 
-        return total
+        return [roll.evaluate(rng) for roll in rolls]
 
-    def format_output(self, author, rolls, modifier_matches, total):
-        output = f"{author.mention}\nRolling: {', '.join(rolls)}"
+    def format_result(self, result) -> str:
+        output = f"Rolling: {result.source} {result.detail}"
+        output += f"\nTotal Result: {result.total}"
 
-        if modifier_matches:
-            modifiers = [f"{operator}{value}" for operator, value in modifier_matches]
-            output += f" {' '.join(modifiers)}"
+        if result.critical_failure:
+            output += " (Critical Failure)"
+        elif result.target is not None:
+            if not result.success:
+                output += " (Failure)"
+            elif result.raises:
+                output += f" (Success with {result.raises} raise{'s' if result.raises > 1 else ''})"
+            else:
+                output += " (Success)"
 
-        output += f"\nTotal Result: {total}"
         return output
 
+    def format_output(self, author, results) -> str:
+        lines = [self.format_result(result) for result in results]
+        return f"{author.mention}\n" + "\n".join(lines)
+
     @commands.command(aliases=["r"])
     async def roll(self, ctx, *args):
         """
@@ -96,28 +103,194 @@ class Dice(commands.Cog):
         Example:
         !roll 1d20
         !roll 2d6+3
-        !roll 2d6-1
-        !roll 2d6 1d6-1
+        !roll 2d6-1 1d4+2
+        !roll d6!
+        !roll d8w+1 tn4
+        !roll 4d6kh3
         """
 
-        cmd = " ".join(args)
-        dice_matches = DICE_RE.findall(cmd)
-        modifier_matches = MODIFIER_RE.findall(cmd)
-
-        if not dice_matches:
-            raise InvalidDiceRoll("No valid dice rolls found.")
+        rng = self.streams.stream(f"channel:{ctx.channel.id}")
+        results = self.roll_dice(" ".join(args), rng)
 
-        rolls, total = self.roll_dice(dice_matches)
-        total = self.calculate_total_with_modifiers(total, modifier_matches)
-
-        output = self.format_output(ctx.author, rolls, modifier_matches, total)
+        output = self.format_output(ctx.author, results)
         await ctx.send(output)
 
+        self.record_rolls(ctx, results)
+        if self.roll_history.model.pending >= FLUSH_SIZE:
+            await self.roll_history.flush()
+
     @roll.error
     async def roll_error(self, ctx, error):
         if isinstance(error, InvalidDiceRoll):
             await ctx.send(error)
 
+    @commands.command(aliases=["hist"])
+    async def history(self, ctx):
+        """
+        Description: Show the most recent rolls in this channel.
+
+        Params:
+        N/A
+
+        Example:
+        !history
+        """
+
+        recent = self.recent.get(ctx.channel.id, ())
+        if ctx.channel.id not in self.loaded:
+            # First look since startup: warm the ring buffer from the log,
+            # keeping any rolls made while it was being read.
+            await self.roll_history.flush()
+            rows = await self.roll_history.read(ctx.channel.id, HISTORY_SIZE)
+            newer = [
+                entry
+                for entry in self.recent.get(ctx.channel.id, ())
+                if not rows or entry[3] > rows[-1][3]
+            ]
+            recent = self.recent[ctx.channel.id] = deque(
+                rows + newer, maxlen=HISTORY_SIZE
+            )
+            self.loaded.add(ctx.channel.id)
+
+        if not recent:
+            await ctx.send("No rolls in this channel yet.")
+            return
+
+        lines = [
+            f"<t:{int(rolled_at)}:t> <@{user_id}> {expression} = **{total}**"
+            for user_id, expression, total, rolled_at in recent
+        ]
+        embed = discord.Embed(
+            title="Roll History", description="\n".join(lines), color=0x00FF00
+        )
+        await ctx.send(embed=embed)
+
+    @commands.command(aliases=["rs"])
+    async def roll_stats(
+        self,
+        ctx,
+        member: discord.Member = commands.parameter(
+            description="Whose rolls to show.", default=None
+        ),
+    ):
+        """
+        Description: Show dice statistics for yourself or another player.
+
+        Params:
+        !rs @Player
+
+        Example:
+        !rs
+        !rs @John
+        """
+
+        member = member or ctx.author
+        await self.roll_history.flush()
+        stats = await self.roll_history.stats(member.id)
+
+        if not stats:
+            await ctx.send(f"No rolls recorded for {member.display_name}.")
+            return
+
+        embed = discord.Embed(title=f"Roll Stats: {member.display_name}", color=0x00FF00)
+        for sides, rolls, total, aces, faces in stats[:25]:
+            spread = " ".join(f"{face}:{count / rolls:.0%}" for face, count in faces)
+            embed.add_field(
+                name=f"d{sides} ({rolls} rolls)",
+                value=f"Mean {total / rolls:.2f}, aces {aces / rolls:.1%}\n{spread}"[:1024],
+                inline=False,
+            )
+        await ctx.send(embed=embed)
+
+    @commands.command()
+    async def seed(self, ctx):
+        """
+        Description: Show the seed of this channel's dice so rolls can be replayed.
+
+        Params:
+        N/A
+
+        Example:
+        !seed
+        """
+
+        rng = self.streams.stream(f"channel:{ctx.channel.id}")
+        await ctx.send(f"Dice seed for this channel: `{rng.seed}`")
+
+    @commands.command()
+    @commands.has_role("GameMaster")
+    async def reseed(
+        self,
+        ctx,
+        seed: int = commands.parameter(description="Seed to replay.", default=None),
+    ):
+        """
+        Description: Start this channel's dice over from a new or given seed.
+
+        Params:
+        !reseed Seed
+
+        Example:
+        !reseed
+        !reseed 1234567890
+        """
+
+        rng = self.streams.reseed(f"channel:{ctx.channel.id}", seed)
+        await ctx.send(f"Dice seed for this channel: `{rng.seed}`")
+
+    def roll_odds(self, cmd: str):
+        actions = 1
+        terms = []
+        for term in cmd.split():
+            match = ACTIONS_RE.fullmatch(term)
+            if match:
+                actions = max(int(match[1]), 1)
+            else:
+                terms.append(term)
+
+        try:
+            rolls = compile_rolls(" ".join(terms))
+            if len(rolls) > 1:
+                raise DiceSyntaxError("Odds take a single roll.")
+            dice, wild, modifier, plain = roll_spec(rolls[0])
+            target = rolls[0].target or DEFAULT_TN
+            chances = exact_odds(dice, wild, modifier, target, actions, plain)
+        except DiceSyntaxError as e:
+            raise InvalidDiceRoll(str(e))
+
+        return rolls[0], target, actions, chances
+
+    @commands.command()
+    async def odds(self, ctx, *args):
+        """
+        Description: Exact chance of success and raises for a roll.
+
+        Params:
+        !odds roll [tnN] [xN]
+
+        Example:
+        !odds d8w
+        !odds d6w+1 tn6
+        !odds d10w x2
+        """
+
+        roll, target, actions, chances = self.roll_odds(" ".join(args))
+
+        output = f"Odds: {roll.source} vs TN {target}"
+        if actions > 1:
+            output += f" ({actions} actions, -{2 * (actions - 1)})"
+        output += f"\nSuccess: {chances.success:.1%}"
+        output += f"\nRaise: {chances.raise_:.1%}"
+        output += f"\nTwo Raises: {chances.two_raises:.1%}"
+        if chances.critical_failure:
+            output += f"\nCritical Failure: {chances.critical_failure:.1%}"
+        await ctx.send(f"{ctx.author.mention}\n{output}")
+
+    @odds.error
+    async def odds_error(self, ctx, error):
+        if isinstance(error, InvalidDiceRoll):
+            await ctx.send(error)
+
 
 async def setup(bot):
     await bot.add_cog(Dice(bot))
@@ -1,18 +1,22 @@
 from dotenv import load_dotenv
 from discord.ext import commands
-from models.MoneyModel import Money
+from models.AsyncModel import AsyncModel
+from models.CharacterModel import CharacterNotFound
+from models.MoneyModel import InsufficientFunds, Money
 import discord
 import os
+import re
 
 load_dotenv()
 
 CHARACTER_CHANNEL_ID = int(os.environ["CHARACTER_CHANNEL_ID"])
+PAYEE_RE = re.compile(r"<?@?!?(\d+)>?:(.+)")
 
 
 class Economy(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.money = Money()
+        self.money = AsyncModel(Money())
 
     async def cog_check(self, ctx):
         return (
@@ -52,15 +56,16 @@ class Economy(commands.Cog):
         !gm 1234567890 John 100
         """
 
-        character = self.money.read(player.id, character_name)
-
-        if character is None:
+        try:
+            await self.money.credit(player.id, character_name, amount)
+        except CharacterNotFound:
             await ctx.author.send(
                 f"{player.name} doesn't have a character named {character_name}."
             )
             return
-
-        self.money.add(player.id, character_name, amount)
+        except ValueError as e:
+            await ctx.author.send(str(e))
+            return
 
         await ctx.author.send(
             f"Gave {amount} money to {character_name} belonging to {player.name}."
@@ -89,28 +94,87 @@ class Economy(commands.Cog):
         !rm 1234567890 John 100
         """
 
-        result = self.money.read(player.id, character_name)
-
-        if result is None:
+        try:
+            await self.money.debit(player.id, character_name, amount)
+        except CharacterNotFound:
             await ctx.author.send(
                 f"{player.name} doesn't have a character named {character_name}."
             )
             return
-
-        if result[0] < amount:
+        except InsufficientFunds:
             await ctx.author.send(
                 f"{character_name} belonging to {player.name} doesn't have enough money."
             )
             return
-
-        self.money.subtract(player.id, character_name, amount)
+        except ValueError as e:
+            await ctx.author.send(str(e))
+            return
 
         await ctx.author.send(
             f"Took {amount} money from {character_name} belonging to {player.name}."
         )
 
+    @commands.command(aliases=["pay"])
+    @commands.has_role("GameMaster")
+    async def pay_characters(
+        self,
+        ctx,
+        amount: int = commands.parameter(
+            description="Amount of money, negative to charge."
+        ),
+        *characters: str,
+    ):
+        """
+        Description: Pay or charge several player characters at once.
+
+        Params:
+        !pay Amount UserID:NameOfCharacter UserID:NameOfCharacter
+
+        Example:
+        !pay 50 1234567890:John 9876543210:Jane
+        """
+
+        entries = []
+        for character in characters:
+            match = PAYEE_RE.fullmatch(character)
+            if match is None:
+                await ctx.author.send(
+                    f"Could not read **{character}**, use UserID:NameOfCharacter."
+                )
+                return
+            entries.append((int(match[1]), match[2], amount))
+
+        if not entries:
+            await ctx.author.send("You must list at least one UserID:NameOfCharacter.")
+            return
+
+        if amount == 0:
+            await ctx.author.send("Amount must not be 0.")
+            return
+
+        try:
+            balances = await self.money.settle(entries)
+        except CharacterNotFound as e:
+            await ctx.author.send(f"No character named {e}, nobody was paid.")
+            return
+        except InsufficientFunds as e:
+            await ctx.author.send(
+                f"{e.character_name} doesn't have enough money, nobody was charged."
+            )
+            return
+
+        lines = [
+            f"{name}: {balance}" for (_, name, _), balance in zip(entries, balances)
+        ]
+        if amount >= 0:
+            summary = f"Paid {amount} money to {len(entries)} characters."
+        else:
+            summary = f"Charged {-amount} money from {len(entries)} characters."
+        await ctx.author.send(summary + "\n" + "\n".join(lines))
+
     @give_money.error
     @take_money.error
+    @pay_characters.error
     async def command_error(self, ctx, error):
         if isinstance(error, commands.MissingRequiredArgument):
             await ctx.author.send(
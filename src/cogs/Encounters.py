@@ -1,26 +1,52 @@
+from concurrent.futures import ProcessPoolExecutor
 from discord.ext import commands
 from dotenv import load_dotenv
+from game.GroupRoll import roll_group, trait_die
+from game.RandomStreams import RandomService
+from game.Simulator import Combatant, batches, simulate_batch, summarize
+from models.AsyncModel import AsyncModel
+from models.CharacterModel import Character
 from models.EncounterModel import Encounter
 from models.EncounterCharModel import EncounterChar
 from models.EncounterMonModel import EncounterMon
 from models.MonsterModel import Monster
 import asyncio
 import discord
+import multiprocessing
 import os
 
 load_dotenv()
 
 TRACKER_CHANNEL_ID = int(os.getenv("TRACKER_CHANNEL_ID"))
+MAX_SIMULATION_RUNS = 20000
+SIMULATION_WORKERS = min(4, os.cpu_count() or 1)
 
 
 class Encounters(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.encounters = {}
-        self.encounter = Encounter()
-        self.char = EncounterChar()
-        self.mon = EncounterMon()
-        self.monster = Monster()
+        self.encounter = AsyncModel(Encounter())
+        self.char = AsyncModel(EncounterChar())
+        self.mon = AsyncModel(EncounterMon())
+        self.monster = AsyncModel(Monster())
+        self.character = AsyncModel(Character())
+        self.streams = RandomService.get()
+        self.simulation_pool = None
+
+    async def cog_unload(self):
+        if self.simulation_pool is not None:
+            self.simulation_pool.shutdown(wait=False, cancel_futures=True)
+
+    def get_simulation_pool(self):
+        if self.simulation_pool is None:
+            # Spawn fresh workers: forking would copy the database threads,
+            # open SQLite connections and the running event loop.
+            self.simulation_pool = ProcessPoolExecutor(
+                max_workers=SIMULATION_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self.simulation_pool
 
     async def cog_check(self, ctx):
         return (
@@ -57,7 +83,7 @@ class Encounters(commands.Cog):
             await ctx.send("Encounter Name must be a string.")
             return
 
-        self.encounter.insert(name)
+        await self.encounter.insert(name)
 
         await ctx.send(f"Encounter **{name}** created successfully")
 
@@ -74,7 +100,7 @@ class Encounters(commands.Cog):
         !efa
         """
 
-        encounters = self.encounter.read_all()
+        encounters = await self.encounter.read_all()
 
         embed = discord.Embed(title="Encounters")
         for encounter in encounters:
@@ -103,7 +129,7 @@ class Encounters(commands.Cog):
             await ctx.send("Encounter ID must be an integer.")
             return
 
-        self.encounter.delete(encounter_id)
+        await self.encounter.delete(encounter_id)
 
         await ctx.send(f"Encounter **{encounter_id}** deleted successfully")
 
@@ -141,7 +167,7 @@ class Encounters(commands.Cog):
             return
 
         encounter_character = (encounter_id, player.id, name)
-        self.char.insert(encounter_character)
+        await self.char.insert(encounter_character)
 
         embed = discord.Embed(
             title="Character Added to Encounter",
@@ -172,7 +198,7 @@ class Encounters(commands.Cog):
             await ctx.send("Encounter ID must be an int.")
             return
 
-        data = self.char.read(encounter_id)
+        data = await self.char.read(encounter_id)
         encounter_name = data[0] if data else None
         characters = data[1] if data else None
 
@@ -222,7 +248,7 @@ class Encounters(commands.Cog):
             return
 
         encounter_character = (encounter_id, player.id, name)
-        self.char.delete(encounter_character)
+        await self.char.delete(encounter_character)
 
         embed = discord.Embed(
             title="Character Removed from Encounter",
@@ -259,7 +285,7 @@ class Encounters(commands.Cog):
             return
 
         encounter_monster = (encounter_id, monster_id)
-        self.mon.insert(encounter_monster)
+        await self.mon.insert(encounter_monster)
 
         embed = discord.Embed(
             title="Monster Added to Encounter",
@@ -289,7 +315,7 @@ class Encounters(commands.Cog):
             await ctx.send("Encounter ID must be an int.")
             return
 
-        data = self.mon.read(encounter_id)
+        data = await self.mon.read(encounter_id)
         encounter_name = data[0] if data else None
         monsters = data[1] if data else None
 
@@ -305,6 +331,133 @@ class Encounters(commands.Cog):
 
         await ctx.send(embed=embed)
 
+    @commands.command(aliases=["egr"])
+    @commands.has_role("GameMaster")
+    async def encounter_group_roll(
+        self,
+        ctx,
+        encounter_id: int = commands.parameter(description="ID of encounter."),
+        trait: str = commands.parameter(description="Attribute or skill to roll."),
+        target: int = commands.parameter(description="Target number.", default=4),
+    ):
+        """
+        Description: Roll a trait for every monster in encounter at once.
+
+        Params:
+        !egr EncounterID Trait TargetNumber
+
+        Example:
+        !egr 1 Fighting
+        !egr 1 Notice 6
+        """
+
+        data = await self.mon.read(encounter_id)
+        encounter_name = data[0] if data else None
+        monsters = data[1] if data else None
+
+        if not monsters:
+            await ctx.send(f"No monsters in encounter **{encounter_id}**.")
+            return
+
+        members = [(monster[1], trait_die(monster, trait)) for monster in monsters]
+        rng = self.streams.stream(f"encounter:{encounter_id}")
+        result = roll_group(members, target, rng=rng)
+
+        embed = discord.Embed(
+            title=f"Group Roll: {trait}",
+            description=f"Encounter **{encounter_name}**, {len(members)} monsters vs TN {target}",
+            color=0x00FF00,
+        )
+        embed.add_field(name="Successes:", value=result.successes, inline=True)
+        embed.add_field(name="Raises:", value=result.raised, inline=True)
+        embed.add_field(
+            name="Failures:", value=len(members) - result.successes, inline=True
+        )
+
+        rolls = ", ".join(
+            f"{name} {total}{'*' if success else ''}"
+            for name, total, success in zip(
+                result.names, result.totals.tolist(), result.success.tolist()
+            )
+        )
+        if len(rolls) > 1024:
+            rolls = rolls[:1021] + "..."
+        embed.add_field(name="Rolls (* success):", value=rolls, inline=False)
+
+        await ctx.send(embed=embed)
+
+    @commands.command(aliases=["esim", "simulate"])
+    @commands.has_role("GameMaster")
+    async def encounter_simulate(
+        self,
+        ctx,
+        encounter_id: int = commands.parameter(description="ID of encounter."),
+        runs: int = commands.parameter(description="Number of fights.", default=1000),
+    ):
+        """
+        Description: Simulate an encounter many times to estimate how it plays out.
+
+        Params:
+        !simulate EncounterID Runs
+
+        Example:
+        !simulate 1
+        !simulate 1 5000
+        """
+
+        runs = max(1, min(runs, MAX_SIMULATION_RUNS))
+
+        encounter_name, characters = await self.char.read(encounter_id)
+        _, monsters = await self.mon.read(encounter_id)
+        if not characters or not monsters:
+            await ctx.send(
+                f"Encounter **{encounter_id}** needs both characters and monsters to simulate."
+            )
+            return
+
+        sheets = [await self.character.read(row[0], row[1]) for row in characters]
+        party = [Combatant.from_sheet(sheet) for sheet in sheets if sheet]
+        foes = [Combatant.from_monster(row) for row in monsters]
+
+        rng = self.streams.stream(f"encounter:{encounter_id}")
+        loop = asyncio.get_running_loop()
+        pool = self.get_simulation_pool()
+        results = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    pool, simulate_batch, party, foes, size, rng.randint(0, 2**62)
+                )
+                for size in batches(runs)
+            )
+        )
+        summary = summarize(results, len(party))
+
+        embed = discord.Embed(
+            title="Encounter Simulation",
+            description=f"Encounter **{encounter_name}**, {summary['runs']} fights",
+            color=0x00FF00,
+        )
+        embed.add_field(name="Party Wins:", value=f"{summary['win_rate']:.1%}", inline=True)
+        embed.add_field(
+            name="Monster Wins:", value=f"{summary['loss_rate']:.1%}", inline=True
+        )
+        embed.add_field(name="Draws:", value=f"{summary['draw_rate']:.1%}", inline=True)
+        embed.add_field(
+            name="Expected Rounds:",
+            value=f"{summary['expected_rounds']:.1f}",
+            inline=False,
+        )
+        embed.add_field(
+            name="Party Casualties:",
+            value="\n".join(
+                f"{count}: {chance:.1%}"
+                for count, chance in enumerate(summary["casualties"])
+            ),
+            inline=False,
+        )
+
+        await ctx.send(embed=embed)
+
     @commands.command(aliases=["erm"])
     @commands.has_role("GameMaster")
     async def encounter_remove_monster(
@@ -332,7 +485,7 @@ class Encounters(commands.Cog):
             return
 
         encounter_monster = (encounter_id, monster_id)
-        self.mon.delete(encounter_monster)
+        await self.mon.delete(encounter_monster)
 
         embed = discord.Embed(
             title="Character Removed from Encounter",
@@ -400,7 +553,7 @@ class Encounters(commands.Cog):
             equipment,
             money,
         )
-        self.monster.insert(monster)
+        await self.monster.insert(monster)
 
         await ctx.send(f"Monster **{monster_name}** created successfully.")
 
@@ -422,7 +575,7 @@ class Encounters(commands.Cog):
         !update 1 attributes="Agility:1d4,Spirit:1d6+2,Strength:1d6" skills="Athletics:1d6,Common Knowledge:1d6,Persuation:1d6-2" equipment="Machete:1"
         """
 
-        monster = self.monster.read(monster_id)
+        monster = await self.monster.read(monster_id)
 
         if not monster:
             await ctx.send(f"Monster **{monster[1]}** not found.")
@@ -490,7 +643,7 @@ class Encounters(commands.Cog):
 
         updated_monster = (health, attributes, skills, equipment, money)
 
-        self.monster.update(monster_id, updated_monster)
+        await self.monster.update(monster_id, updated_monster)
 
         await ctx.send(f"Monster **{monster[1]}** updated successfully.")
 
@@ -508,13 +661,13 @@ class Encounters(commands.Cog):
         !dm 1
         """
 
-        monster = self.monster.read(monster_id)
+        monster = await self.monster.read(monster_id)
 
         if not monster:
             await ctx.send(f"Monster **{monster[1]}** not found.")
             return
 
-        self.monster.delete(monster_id)
+        await self.monster.delete(monster_id)
 
         await ctx.send(f"Monster **{monster[1]}** deleted successfully.")
 
@@ -1,6 +1,9 @@
 from dotenv import load_dotenv
 from discord.ext import commands
-from models.ItemModel import Item
+from models.AsyncModel import AsyncModel
+from models.CharacterModel import CharacterNotFound
+from models.ItemModel import Item, ItemNotFound, QuantityLimitExceeded
+from models.MoneyModel import InsufficientFunds
 import discord
 import os
 
@@ -12,7 +15,7 @@ MARKET_CHANNEL_ID = int(os.environ["MARKET_CHANNEL_ID"])
 class Store(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.item = Item()
+        self.item = AsyncModel(Item())
 
     async def cog_check(self, ctx):
         return (
@@ -54,7 +57,7 @@ class Store(commands.Cog):
 
         new_item = (item_name, category, price)
 
-        self.item.insert(new_item)
+        await self.item.insert(new_item)
 
         await ctx.send(f"Added **{item_name}** to the store with a value of {price}.")
 
@@ -76,7 +79,7 @@ class Store(commands.Cog):
         !delete_item 1 Machete
         """
 
-        self.item.delete(item_id, item_name)
+        await self.item.delete(item_id, item_name)
 
         await ctx.send(f"Removed **{item_name}** from the store.")
 
@@ -92,7 +95,7 @@ class Store(commands.Cog):
         !view_items
         """
 
-        items = self.item.read_all()
+        items = await self.item.read_all()
 
         if not items:
             await ctx.send("The store is currently empty.")
@@ -130,54 +133,27 @@ class Store(commands.Cog):
             await ctx.send("You cannot buy more than 100 of the same item.")
             return
 
-        data = self.item.read(item_name)
-
-        if data is None:
+        try:
+            await self.item.purchase(
+                str(ctx.author.id), character_name, item_name, quantity
+            )
+        except ItemNotFound:
             await ctx.send(f"The item **{item_name}** does not exist in the store.")
             return
-
-        value = data[3] * quantity
-        result = self.item.buy(str(ctx.author.id), character_name)
-
-        if result is None:
+        except CharacterNotFound:
             await ctx.send(f"You don't have a character named **{character_name}**.")
             return
-
-        if result[0] < value:
+        except InsufficientFunds:
             await ctx.send(
                 f"Your character **{character_name}** does not have enough money to buy this item."
             )
             return
-
-        item_counts = {}
-        if result[1]:
-            # Parse the existing equipment string into a dictionary
-            items = result[1].split(",")
-            for item in items:
-                item = item.strip()
-                name, count = item.split(":")
-                item_counts[name] = int(count)
-
-        item_count = item_counts.get(item_name, 0)
-        if item_count + quantity > 100:
+        except QuantityLimitExceeded as e:
             await ctx.send(
-                f"You already have {item_count} unit(s) of **{item_name}** in your inventory. Cannot buy more than 100 in total."
+                f"You already have {e.owned} unit(s) of **{item_name}** in your inventory. Cannot buy more than {e.limit} in total."
             )
             return
 
-        # Update the item counts dictionary with the purchased items
-        item_counts[item_name] = item_count + quantity
-
-        # Convert the item counts dictionary back to a string
-        new_equipment = ",".join(
-            [f"{name}:{count}" for name, count in item_counts.items()]
-        )
-
-        # Update the character's money and equipment
-        new_money = result[0] - value
-        character = (new_money, new_equipment, str(ctx.author.id), character_name)
-        self.item.update(character)
-
         await ctx.send(
             f"Your character **{character_name}** has bought {quantity} unit(s) of {item_name}."
         )
@@ -206,7 +182,7 @@ class Store(commands.Cog):
         else:
             player_id = player_id
 
-        result = self.item.money(player_id, character_name)
+        result = await self.item.money(player_id, character_name)
 
         if result is None:
             await ctx.author.send(
@@ -87,6 +87,7 @@ class Tokens(commands.Cog):
 
         self.players[player.id].add_token(token)
         await ctx.send(f"{player.mention} has been given the {token} token.")
+        self.bot.dispatch("tokens_changed", ctx.guild.id, ctx.channel.id)
 
     @commands.command(aliases=["rt"])
     @commands.has_role("GameMaster")
@@ -115,6 +116,7 @@ class Tokens(commands.Cog):
         if player.id in self.players and token in self.players[player.id].tokens:
             self.players[player.id].remove_token(token)
             await ctx.send(f"{player.mention} no longer has the {token} token.")
+            self.bot.dispatch("tokens_changed", ctx.guild.id, ctx.channel.id)
         else:
             await ctx.send(f"{player.mention} has no tokens.")
 
@@ -140,6 +142,7 @@ class Tokens(commands.Cog):
         if player.id in self.players:
             self.players[player.id].clear_tokens()
             await ctx.send(f"All tokens have been cleared for {player.mention}.")
+            self.bot.dispatch("tokens_changed", ctx.guild.id, ctx.channel.id)
 
     @commands.command(aliases=["st"])
     @commands.has_role("GameMaster")
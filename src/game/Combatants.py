@@ -0,0 +1,79 @@
+from bisect import bisect_left, insort
+import itertools
+
+NO_CARD = -1
+
+
+def initiative_key(player):
+    return player.card_values[-1] if player.card_values else NO_CARD
+
+
+class CombatantRegistry:
+    """
+    Combatants of one initiative session, always in initiative order.
+
+    Entries are kept in a sorted list of (-card value, sequence, player), so
+    dealing a card to one combatant or adding a late arrival moves a single
+    entry instead of re-sorting everyone. Names (case-insensitive) are
+    indexed for O(1) lookups.
+    """
+
+    def __init__(self, players=()):
+        self._order = []
+        self._entries = {}
+        self._by_name = {}
+        self._sequence = itertools.count()
+        for player in players:
+            self.add(player)
+
+    def __len__(self):
+        return len(self._order)
+
+    def __iter__(self):
+        return (entry[2] for entry in self._order)
+
+    def __getitem__(self, index):
+        return self._order[index][2]
+
+    def __contains__(self, player):
+        return player in self._entries
+
+    def _entry(self, player):
+        return (-initiative_key(player), next(self._sequence), player)
+
+    def _position(self, player):
+        entry = self._entries[player]
+        return bisect_left(self._order, entry[:2], key=lambda item: item[:2])
+
+    def add(self, player):
+        entry = self._entry(player)
+        self._entries[player] = entry
+        insort(self._order, entry, key=lambda item: item[:2])
+        self._by_name.setdefault(player.name.lower(), []).append(player)
+
+    def remove(self, player):
+        del self._order[self._position(player)]
+        del self._entries[player]
+        named = self._by_name[player.name.lower()]
+        named.remove(player)
+        if not named:
+            del self._by_name[player.name.lower()]
+
+    def reposition(self, player):
+        """Move one player after their latest card changed."""
+        del self._order[self._position(player)]
+        entry = self._entries[player] = self._entry(player)
+        insort(self._order, entry, key=lambda item: item[:2])
+
+    def rebuild(self):
+        for player in list(self):
+            self.reposition(player)
+
+    def index(self, player):
+        return self._position(player)
+
+    def find(self, name):
+        if name is None:
+            return None
+        named = self._by_name.get(name.lower())
+        return named[0] if named else None
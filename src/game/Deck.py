@@ -0,0 +1,145 @@
+import random
+
+# Cards are the integers 0..53. Card n is rank RANKS[n // 4] of suit
+# SUITS[n % 4], and 52 and 53 are the two Jokers, so a card's number already
+# orders it by rank first and suit second, the way initiative is read.
+# A shoe of several decks numbers the copies on: card 54 + n is the second
+# deck's copy of card n.
+RANKS = ("2", "3", "4", "5", "6", "7", "8", "9", "10", "Jack", "Queen", "King", "Ace")
+SUITS = ("Clubs", "Diamonds", "Hearts", "Spades")
+JOKERS = (52, 53)
+DECK_SIZE = 54
+MAX_DECKS = 10
+
+CARD_KEY = tuple(range(52)) + (52, 52)  # both Jokers tie at the top
+CARD_NAMES = tuple(
+    f"{RANKS[index // 4]} of {SUITS[index % 4]}" for index in range(52)
+) + ("Joker", "Joker")
+
+
+def card_key(card):
+    return CARD_KEY[card % DECK_SIZE]
+
+
+def card_name(card):
+    return CARD_NAMES[card % DECK_SIZE]
+
+
+def is_joker(card):
+    return card % DECK_SIZE >= JOKERS[0]
+
+
+class Player:
+    def __init__(self, name, health, monster=False, combatant_id=None):
+        self.name = name
+        self.health = health
+        self.monster = monster
+        self.id = combatant_id
+        self.cards = []
+        self.card_values = []
+
+    def get_cards(self):
+        return ", ".join(card_name(card) for card in self.cards)
+
+    def deal_card(self, card, card_value):
+        self.cards.append(card)
+        self.card_values.append(card_value)
+
+
+class Deck:
+    """
+    A shoe of one or more decks with a discard pile.
+
+    Hands go to the discard pile when a new round is dealt. After a round in
+    which a Joker came up, or whenever the shoe runs dry, the discards are
+    shuffled back in; if every card is in someone's hand, another deck is
+    added, so dealing never fails. ``shoe`` is the number of decks a fresh
+    shoe starts with.
+    """
+
+    def __init__(self, rng=random, decks=1):
+        self.rng = rng
+        self.shoe = decks
+        self.decks = decks
+        self.cards = []
+        self.discards = []
+        self.joker_dealt = False
+        self.shuffles = 0
+        self.players = []
+        self.user_cards = {}
+        self.create_deck()
+
+    @property
+    def remaining(self):
+        return len(self.cards)
+
+    def create_deck(self):
+        self.decks = self.shoe
+        self.cards = list(range(DECK_SIZE * self.decks))
+        self.rng.shuffle(self.cards)
+        self.discards = []
+        self.joker_dealt = False
+        self.shuffles += 1
+
+    def shuffle_in(self, cards):
+        """
+        Merge cards into the shuffled shoe at uniformly random places.
+
+        This continues an inside-out Fisher-Yates shuffle over the shoe, so it
+        costs O(len(cards)) and leaves the whole shoe uniformly shuffled.
+        """
+        for card in cards:
+            self.cards.append(card)
+            j = self.rng.randint(0, len(self.cards) - 1)
+            self.cards[-1], self.cards[j] = self.cards[j], card
+        self.shuffles += 1
+
+    def reshuffle(self):
+        discards, self.discards = self.discards, []
+        self.shuffle_in(discards)
+        self.joker_dealt = False
+
+    def add_deck(self):
+        first = DECK_SIZE * self.decks
+        self.decks += 1
+        self.shuffle_in(range(first, first + DECK_SIZE))
+
+    def new_round(self):
+        """Discard every hand, reshuffling if a Joker was dealt last round."""
+        for player in self.players:
+            self.discards.extend(player.cards)
+            player.cards = []
+            player.card_values = []
+        if self.joker_dealt:
+            self.reshuffle()
+
+    def deal_card(self, player):
+        if not self.cards:
+            self.reshuffle()
+        if not self.cards:
+            self.add_deck()
+
+        card = self.cards.pop()
+        if is_joker(card):
+            self.joker_dealt = True
+        player.deal_card(card, card_key(card))
+        return card
+
+    def take(self, card):
+        """Remove a specific card, normally the next one, when replaying a deal."""
+        if self.cards and self.cards[-1] == card:
+            self.cards.pop()
+        elif card in self.cards:
+            self.cards.remove(card)
+        if is_joker(card):
+            self.joker_dealt = True
+
+    def reset_deck(self):
+        self.create_deck()
+        self.user_cards = {}
+        for player in self.players:
+            player.cards = []
+            player.card_values = []
+
+    def get_card_value(self, card):
+        return card_key(card)
@@ -0,0 +1,314 @@
+"""
+Compiled dice expressions with SWADE syntax.
+
+    2d6-1 1d4+2     two rolls, each with its own modifier
+    d6!             exploding (acing) die
+    d8w             trait die plus an acing d6 wild die, best one counts
+    d8w10           ... with a d10 wild die
+    4d6kh3          keep the highest three
+    (1d6+2)+d4      grouping
+    d8w+1 tn6       roll against target number 6 (">=6" also works)
+
+Source text is compiled once into a small AST; compiled rolls live in an LRU
+cache so repeated macros skip the parser entirely.
+"""
+
+from functools import lru_cache
+import random
+import re
+
+MAX_DICE = 10
+MAX_SIDES = 100
+MAX_ACES = 50
+WILD_DIE_SIDES = 6
+RAISE_STEP = 4
+
+TOKEN_RE = re.compile(r"\s*(\d+|kh|kl|tn|>=|[d()+\-!w])")
+
+
+class DiceSyntaxError(ValueError):
+    """Raised when a dice expression cannot be compiled."""
+
+    pass
+
+
+class DieRoll:
+    """The faces rolled by one (possibly acing) die."""
+
+    __slots__ = ("sides", "faces", "wild", "kept")
+
+    def __init__(self, sides, faces, wild=False):
+        self.sides = sides
+        self.faces = faces
+        self.wild = wild
+        self.kept = True
+
+    @property
+    def total(self):
+        return sum(self.faces)
+
+    def __str__(self):
+        text = "+".join(str(face) for face in self.faces)
+        if self.wild:
+            text = f"w{text}"
+        return text if self.kept else f"~~{text}~~"
+
+
+class Number:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def evaluate(self, rng, dice):
+        return self.value, str(self.value)
+
+
+class Dice:
+    __slots__ = ("count", "sides", "explode", "wild", "keep", "lowest")
+
+    def __init__(self, count, sides):
+        self.count = count
+        self.sides = sides
+        self.explode = False
+        self.wild = 0
+        self.keep = None
+        self.lowest = False
+
+    def roll_die(self, rng, sides, explode, wild=False):
+        faces = [rng.randint(1, sides)]
+        while explode and faces[-1] == sides and len(faces) <= MAX_ACES:
+            faces.append(rng.randint(1, sides))
+        return DieRoll(sides, faces, wild)
+
+    def evaluate(self, rng, dice):
+        pool = [
+            self.roll_die(rng, self.sides, self.explode) for _ in range(self.count)
+        ]
+        keep = self.keep
+        if self.wild:
+            pool.append(self.roll_die(rng, self.wild, True, wild=True))
+            keep = keep or self.count
+
+        if keep is not None and keep < len(pool):
+            ranked = sorted(pool, key=lambda die: die.total, reverse=not self.lowest)
+            for die in ranked[keep:]:
+                die.kept = False
+
+        dice.extend(pool)
+        total = sum(die.total for die in pool if die.kept)
+        return total, f"[{', '.join(str(die) for die in pool)}]"
+
+
+class BinaryOp:
+    __slots__ = ("op", "left", "right")
+
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def evaluate(self, rng, dice):
+        left, left_text = self.left.evaluate(rng, dice)
+        right, right_text = self.right.evaluate(rng, dice)
+        value = left + right if self.op == "+" else left - right
+        return value, f"{left_text} {self.op} {right_text}"
+
+
+class Group:
+    __slots__ = ("expr",)
+
+    def __init__(self, expr):
+        self.expr = expr
+
+    def evaluate(self, rng, dice):
+        value, text = self.expr.evaluate(rng, dice)
+        return value, f"({text})"
+
+
+class RollResult:
+    __slots__ = ("source", "total", "detail", "target", "dice")
+
+    def __init__(self, source, total, detail, target, dice):
+        self.source = source
+        self.total = total
+        self.detail = detail
+        self.target = target
+        self.dice = dice
+
+    @property
+    def critical_failure(self):
+        # Snake eyes: the trait die and the wild die both came up 1.
+        wild = [die for die in self.dice if die.wild]
+        return bool(wild) and all(die.faces[0] == 1 for die in self.dice)
+
+    @property
+    def success(self):
+        return (
+            self.target is not None
+            and not self.critical_failure
+            and self.total >= self.target
+        )
+
+    @property
+    def raises(self):
+        if not self.success:
+            return 0
+        return (self.total - self.target) // RAISE_STEP
+
+
+class Roll:
+    """One compiled roll: an expression and an optional target number."""
+
+    __slots__ = ("source", "expr", "target")
+
+    def __init__(self, source, expr, target=None):
+        self.source = source
+        self.expr = expr
+        self.target = target
+
+    def evaluate(self, rng=random):
+        dice = []
+        total, detail = self.expr.evaluate(rng, dice)
+        return RollResult(self.source, total, detail, self.target, dice)
+
+
+class Parser:
+    def __init__(self, text):
+        self.text = text
+        self.tokens = self.tokenize(text)
+        self.pos = 0
+        self.rolled = False  # Whether the roll being parsed has any dice.
+
+    @staticmethod
+    def tokenize(text):
+        tokens = []
+        pos = 0
+        text = text.rstrip()
+        while pos < len(text):
+            match = TOKEN_RE.match(text, pos)
+            if match is None:
+                raise DiceSyntaxError(f"Unexpected `{text[pos:].strip()}` in roll.")
+            tokens.append((match[1], match.start(1), match.end(1)))
+            pos = match.end()
+        return tokens
+
+    def peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def next(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def attached_number(self):
+        """Whether the next token is a number written right against the last one."""
+        return (
+            self.peek() is not None
+            and self.peek().isdigit()
+            and self.tokens[self.pos][1] == self.tokens[self.pos - 1][2]
+        )
+
+    def number(self):
+        token = self.next()
+        if token is None or not token.isdigit():
+            raise DiceSyntaxError("Expected a number in roll.")
+        return int(token)
+
+    def parse(self):
+        rolls = []
+        while self.peek() is not None:
+            start = self.tokens[self.pos][1]
+            self.rolled = False
+            expr = self.expression()
+            if not self.rolled:
+                raise DiceSyntaxError("No valid dice rolls found.")
+            target = None
+            if self.peek() in ("tn", ">="):
+                self.next()
+                target = self.number()
+            end = self.tokens[self.pos][1] if self.pos < len(self.tokens) else None
+            rolls.append(Roll(self.text[start:end].strip(), expr, target))
+
+        if not rolls:
+            raise DiceSyntaxError("No valid dice rolls found.")
+        return tuple(rolls)
+
+    def expression(self):
+        node = self.term()
+        while self.peek() in ("+", "-"):
+            op = self.next()
+            node = BinaryOp(op, node, self.term())
+        return node
+
+    def term(self):
+        token = self.peek()
+        if token == "(":
+            self.next()
+            node = self.expression()
+            if self.next() != ")":
+                raise DiceSyntaxError("Missing `)` in roll.")
+            return Group(node)
+
+        if token == "d":
+            return self.dice(1)
+
+        if token is not None and token.isdigit():
+            end = self.tokens[self.pos][2]
+            value = self.number()
+            # "2d6" is a dice term, but "-1 d8" is a modifier followed by a new roll.
+            if self.peek() == "d" and self.tokens[self.pos][1] == end:
+                return self.dice(value)
+            return Number(value)
+
+        raise DiceSyntaxError(f"Unexpected `{token or 'end of roll'}` in roll.")
+
+    def dice(self, count):
+        self.next()  # "d"
+        self.rolled = True
+        node = Dice(count, self.number())
+        while self.peek() in ("!", "w", "kh", "kl"):
+            token = self.next()
+            if token == "!":
+                node.explode = True
+            elif token == "w":
+                node.explode = True  # trait dice always ace
+                node.wild = WILD_DIE_SIDES
+                # "d8w4" sets the wild die, but in "d8w 2d6" the 2 starts a new roll.
+                if self.attached_number():
+                    node.wild = self.number()
+            else:
+                node.keep = self.number() if self.attached_number() else 1
+                node.lowest = token == "kl"
+
+        validate(node)
+        return node
+
+
+def validate(node):
+    if node.count <= 0:
+        raise DiceSyntaxError("Dice must be greater than 0")
+    if node.sides <= 0:
+        raise DiceSyntaxError("Sides must be greater than 0")
+    if node.count > MAX_DICE:
+        raise DiceSyntaxError(f"Cannot roll more than {MAX_DICE} dice at once")
+    if node.sides > MAX_SIDES or node.wild > MAX_SIDES:
+        raise DiceSyntaxError(f"Dice faces cannot exceed {MAX_SIDES}")
+    if node.explode and (node.sides < 2 or node.wild == 1):
+        raise DiceSyntaxError("Only dice with 2 or more sides can ace")
+    if node.keep is not None and node.keep <= 0:
+        raise DiceSyntaxError("Must keep at least one die")
+
+
+@lru_cache(maxsize=512)
+def _compile(text):
+    return Parser(text).parse()
+
+
+def compile_rolls(text):
+    """Compile "2d6-1 1d4+2" style text into a tuple of Roll objects."""
+    return _compile(" ".join(text.lower().split()))
+
+
+def cache_info():
+    return _compile.cache_info()
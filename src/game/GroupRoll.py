@@ -0,0 +1,98 @@
+"""
+Group rolls: one trait rolled for a whole mob of extras in a single batch.
+
+Dice of the same size are rolled together as one NumPy array, and only the
+dice that aced are rerolled, so a round for thirty goblins costs a handful
+of array operations instead of thirty parsed rolls.
+"""
+
+from game.DiceEngine import MAX_ACES, RAISE_STEP, WILD_DIE_SIDES
+from models.CharacterModel import parse_pairs
+from models.CharacterSheet import TraitDie
+import numpy as np
+
+UNSKILLED = TraitDie("1d4-2")
+
+
+def trait_die(monster, trait):
+    """Find a trait on a monster row, falling back to an unskilled d4-2."""
+    trait = trait.lower()
+    for column in (monster[3], monster[4]):
+        for name, value in parse_pairs(column):
+            if name.lower() == trait:
+                die = TraitDie(value)
+                return die if die.valid else UNSKILLED
+    return UNSKILLED
+
+
+def ace(rng, sides, shape):
+    """Roll acing dice, returning an array of totals with the given shape."""
+    totals = rng.integers(1, sides + 1, size=shape)
+    first = totals.copy()
+    rolling = totals == sides
+    for _ in range(MAX_ACES):
+        if not rolling.any():
+            break
+        extra = rng.integers(1, sides + 1, size=int(rolling.sum()))
+        totals[rolling] += extra
+        rolling[rolling] = extra == sides
+    return totals, first
+
+
+class GroupRoll:
+    """Totals for every member of a group roll against one target number."""
+
+    __slots__ = ("names", "totals", "critical", "target")
+
+    def __init__(self, names, totals, critical, target):
+        self.names = names
+        self.totals = totals
+        self.critical = critical
+        self.target = target
+
+    @property
+    def success(self):
+        return (self.totals >= self.target) & ~self.critical
+
+    @property
+    def raises(self):
+        return np.where(self.success, (self.totals - self.target) // RAISE_STEP, 0)
+
+    @property
+    def successes(self):
+        return int(self.success.sum())
+
+    @property
+    def raised(self):
+        return int((self.raises > 0).sum())
+
+    @property
+    def critical_failures(self):
+        return int(self.critical.sum())
+
+
+def roll_group(members, target=4, wild=False, rng=None):
+    """
+    Roll every (name, TraitDie) in ``members`` at once. Wild Cards add a
+    d6 wild die each and can roll snake eyes; extras never do.
+    """
+    rng = rng or np.random.default_rng()
+    names = [name for name, _ in members]
+    totals = np.zeros(len(members), dtype=np.int64)
+    critical = np.zeros(len(members), dtype=bool)
+
+    groups = {}
+    for index, (_, die) in enumerate(members):
+        groups.setdefault((die.dice, die.sides), []).append(index)
+
+    for (count, sides), indexes in groups.items():
+        rolled, first = ace(rng, sides, (len(indexes), count))
+        trait, ones = rolled.sum(axis=1), (first == 1).all(axis=1)
+        if wild:
+            wild_rolled, wild_first = ace(rng, WILD_DIE_SIDES, len(indexes))
+            trait = np.maximum(trait, wild_rolled)
+            critical[indexes] = ones & (wild_first == 1)
+        totals[indexes] = trait
+
+    totals += np.array([die.modifier for _, die in members], dtype=np.int64)
+    return GroupRoll(names, totals, critical, target)
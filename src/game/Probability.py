@@ -0,0 +1,145 @@
+"""
+Exact SWADE odds for trait and damage rolls.
+
+Acing dice have an unbounded range, so every distribution is computed up to
+the highest total a question needs, with the last bucket holding the chance
+of that total or more. Capping each die that way keeps every answer exact,
+because the dice are positive and their sum reaches the cap exactly when the
+capped sum does. Dice are combined with NumPy: sums by convolution, the wild
+die by multiplying CDFs.
+"""
+
+from collections import namedtuple
+from functools import lru_cache, reduce
+from game.DiceEngine import RAISE_STEP, BinaryOp, Dice, DiceSyntaxError, Group, Number
+import numpy as np
+
+MAX_TOTAL = 4096  # the highest total odds() will compute up to
+DEFAULT_TN = 4
+MULTI_ACTION_PENALTY = 2
+
+Odds = namedtuple("Odds", ["success", "raise_", "two_raises", "critical_failure"])
+
+
+def exploding_pmf(sides, limit):
+    """
+    Probability of every total 0..limit-1 for one acing die, with the chance
+    of limit or more in the last bucket.
+    """
+    pmf = np.zeros(limit + 1)
+    chance = 1.0 / sides
+    weight = chance
+    base = 0
+    faces = np.arange(1, sides)  # rolling the top face aces and rolls again
+    while base < limit and weight > 0:
+        values = base + faces
+        pmf[values[values < limit]] += weight
+        base += sides
+        weight *= chance
+    pmf[limit] = max(0.0, 1.0 - pmf[:limit].sum())
+    return pmf
+
+
+def flat_pmf(sides, limit):
+    """Probability of every total for one die that does not ace, capped like above."""
+    pmf = np.zeros(max(sides, limit) + 1)
+    pmf[1 : sides + 1] = 1.0 / sides
+    return cap(pmf, limit)
+
+
+@lru_cache(maxsize=256)
+def die_pmf(sides, limit, explode=True):
+    pmf = exploding_pmf(sides, limit) if explode else flat_pmf(sides, limit)
+    pmf.flags.writeable = False  # shared between callers through the cache
+    return pmf
+
+
+def cap(pmf, limit):
+    """Fold the mass at limit and above into the last bucket."""
+    if len(pmf) <= limit + 1:
+        return pmf
+    capped = pmf[: limit + 1].copy()
+    capped[limit] = pmf[limit:].sum()
+    return capped
+
+
+def total_pmf(dice, limit, plain=()):
+    pmfs = [die_pmf(sides, limit) for sides in dice]
+    pmfs += [die_pmf(sides, limit, False) for sides in plain]
+    return reduce(lambda total, pmf: cap(np.convolve(total, pmf), limit), pmfs)
+
+
+def survival(pmf):
+    """sf[v] is the probability of rolling v or more."""
+    return np.append(pmf[::-1].cumsum()[::-1], 0.0)
+
+
+@lru_cache(maxsize=4096)
+def odds(dice, wild=0, modifier=0, tn=DEFAULT_TN, actions=1, plain=()):
+    """
+    Odds of success, one raise and two raises for the sum of acing ``dice``
+    and non-acing ``plain`` dice (tuples of sides), optionally against a
+    ``wild`` die, plus ``modifier`` and the multi-action penalty for
+    ``actions`` actions.
+    """
+    modifier -= MULTI_ACTION_PENALTY * (actions - 1)
+    lowest = len(dice) + len(plain)  # the total when every trait die shows a 1
+    limit = max(tn + 2 * RAISE_STEP - modifier, lowest) + 1
+    if limit > MAX_TOTAL:
+        raise DiceSyntaxError(f"Odds only go up to totals of {MAX_TOTAL}.")
+
+    pmf = total_pmf(dice, limit, plain)
+    critical = 0.0
+
+    if wild:
+        cdf = np.cumsum(pmf) * np.cumsum(die_pmf(wild, limit))
+        pmf = np.diff(cdf, prepend=0.0)
+        # Snake eyes: every trait die and the wild die show a 1.
+        critical = np.prod([1.0 / sides for sides in dice + plain]) / wild
+
+    sf = survival(pmf)
+
+    def at_least(total):
+        need = total - modifier
+        chance = 1.0 if need <= 0 else sf[min(need, len(sf) - 1)]
+        if critical and need <= lowest:
+            chance -= critical
+        return float(chance)
+
+    return Odds(
+        at_least(tn),
+        at_least(tn + RAISE_STEP),
+        at_least(tn + 2 * RAISE_STEP),
+        float(critical),
+    )
+
+
+def roll_spec(roll):
+    """Turn a compiled Roll into the (dice, wild, modifier, plain) odds() needs."""
+    dice = []
+    plain = []
+    wild = 0
+    modifier = 0
+
+    def visit(node, sign):
+        nonlocal wild, modifier
+        if isinstance(node, Number):
+            modifier += sign * node.value
+        elif isinstance(node, Group):
+            visit(node.expr, sign)
+        elif isinstance(node, BinaryOp):
+            visit(node.left, sign)
+            visit(node.right, sign if node.op == "+" else -sign)
+        elif isinstance(node, Dice):
+            if sign < 0 or node.keep is not None or node.sides < 2:
+                raise DiceSyntaxError("Odds only support added dice and modifiers.")
+            if node.wild:
+                if wild:
+                    raise DiceSyntaxError("Odds support a single wild die.")
+                wild = node.wild
+            (dice if node.explode else plain).extend([node.sides] * node.count)
+
+    visit(roll.expr, 1)
+    if not dice and not plain:
+        raise DiceSyntaxError("No dice to compute odds for.")
+    return tuple(dice), wild, modifier, tuple(plain)
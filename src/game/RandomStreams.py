@@ -0,0 +1,112 @@
+"""
+Seeded, replayable random streams.
+
+Every channel or encounter draws from its own PCG64 generator. Doubles are
+generated in blocks into a buffer, and every draw (dice, group rolls, deck
+shuffles) consumes that buffer in order, so a logged seed replays a session
+exactly no matter how the draws were batched.
+"""
+
+from models.RngSeedModel import RngSeed
+import numpy as np
+import secrets
+import threading
+
+BUFFER_SIZE = 4096
+
+
+class RandomStream:
+    """A PCG64 stream with the randint/integers/shuffle calls the game uses."""
+
+    __slots__ = ("scope", "seed", "buffer_size", "generator", "_buffer", "_pos")
+
+    def __init__(self, seed, scope=None, buffer_size=BUFFER_SIZE):
+        self.scope = scope
+        self.seed = seed
+        self.buffer_size = buffer_size
+        self.generator = np.random.Generator(np.random.PCG64(seed))
+        self._buffer = self.generator.random(buffer_size)
+        self._pos = 0
+
+    def _take(self, count):
+        if self._pos + count > len(self._buffer):
+            rest = self._buffer[self._pos :]
+            fresh = self.generator.random(max(self.buffer_size, count - len(rest)))
+            self._buffer = np.concatenate((rest, fresh))
+            self._pos = 0
+
+        chunk = self._buffer[self._pos : self._pos + count]
+        self._pos += count
+        return chunk
+
+    def random(self):
+        if self._pos >= len(self._buffer):
+            self._buffer = self.generator.random(self.buffer_size)
+            self._pos = 0
+        value = self._buffer[self._pos]
+        self._pos += 1
+        return float(value)
+
+    def randint(self, low, high):
+        """Integer in [low, high], like random.randint."""
+        return low + int(self.random() * (high - low + 1))
+
+    def integers(self, low, high, size=None):
+        """Integers in [low, high), like numpy's Generator.integers."""
+        if size is None:
+            return low + int(self.random() * (high - low))
+        count = int(np.prod(size))
+        values = low + (self._take(count) * (high - low)).astype(np.int64)
+        return values.reshape(size)
+
+    def shuffle(self, items):
+        """Fisher-Yates shuffle in place, like random.shuffle."""
+        draws = self._take(max(len(items) - 1, 0))
+        for offset, i in enumerate(range(len(items) - 1, 0, -1)):
+            j = int(draws[offset] * (i + 1))
+            items[i], items[j] = items[j], items[i]
+
+
+class RandomService:
+    """
+    Registry of streams keyed by scope, e.g. "channel:123" or "encounter:4".
+    New seeds are passed to ``log`` so they can be looked up for a replay.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, log=None, buffer_size=BUFFER_SIZE):
+        self.log = log
+        self.buffer_size = buffer_size
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(log=RngSeed().log)
+            return cls._instance
+
+    def stream(self, scope):
+        with self._lock:
+            stream = self._streams.get(scope)
+        return stream if stream is not None else self.reseed(scope)
+
+    def reseed(self, scope, seed=None):
+        """Start a fresh stream for scope, from seed when replaying."""
+        if seed is None:
+            seed = secrets.randbits(63)  # fits a signed SQLite INTEGER
+
+        stream = RandomStream(seed, scope, self.buffer_size)
+        with self._lock:
+            self._streams[scope] = stream
+        if self.log is not None:
+            self.log(scope, seed)
+        return stream
+
+    @staticmethod
+    def replay(seed, scope=None):
+        """A detached stream that repeats the draws of a logged seed."""
+        return RandomStream(seed, scope)
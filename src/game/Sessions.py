@@ -0,0 +1,229 @@
+from collections import OrderedDict
+from game.Combatants import CombatantRegistry
+from game.Deck import Deck, Player, card_key
+import threading
+import time
+
+IDLE_SECONDS = 6 * 60 * 60
+SNAPSHOT_EVERY = 50
+
+
+class InitiativeSession:
+    """
+    The deck, combatants and turn pointer of one table.
+
+    Every change goes through a method that also journals it to ``store``
+    (see models/InitiativeLogModel.py) and takes a full snapshot every
+    SNAPSHOT_EVERY events, so a restarted bot can rebuild the session from
+    its last snapshot plus the events after it. Reshuffling the shoe is
+    random and cannot be replayed, so any event that reshuffled is followed
+    by a snapshot right away.
+    """
+
+    def __init__(self, key, deck, store=None):
+        self.key = key
+        self.deck = deck
+        self.deck.players = CombatantRegistry()
+        self.store = store
+        self.current_turn = 0
+        self.encounter_id = None
+        self.last_used = time.monotonic()
+        self.unsaved = 0
+        self.saved_shuffles = deck.shuffles
+        self.restoring = None
+        self.tracker = None  # The live tracker message, owned by the cog.
+        self.tracker_message_id = None
+
+    @property
+    def players(self):
+        return self.deck.players
+
+    @property
+    def current_player(self):
+        if not self.deck.players:
+            return None
+        return self.deck.players[self.current_turn % len(self.deck.players)]
+
+    def start(self, encounter_id, players):
+        self.apply("start", {"encounter_id": encounter_id, "players": players})
+        self.record("start", encounter_id=encounter_id, players=players)
+
+    def find(self, name):
+        return self.players.find(name)
+
+    def deal(self, player):
+        index = self.players.index(player)
+        card = self._deal(player)
+        self.record("deal", player=index, card=card)
+        return card
+
+    def _deal(self, player, card=None):
+        # The combatant whose turn it is keeps the turn while others move.
+        current = self.current_player
+        if card is None:
+            card = self.deck.deal_card(player)
+        else:
+            self.deck.take(card)
+            player.deal_card(card, card_key(card))
+        self.players.reposition(player)
+        if current is not None:
+            self.current_turn = self.players.index(current)
+        return card
+
+    def sort(self):
+        """Start the round: the order is already sorted, the top card acts."""
+        self.apply("sort", {})
+        self.record("sort")
+
+    def advance(self):
+        self.current_turn = (self.current_turn + 1) % len(self.deck.players)
+        self.record("turn", turn=self.current_turn)
+        return self.deck.players[self.current_turn]
+
+    def set_tracker_message(self, message_id):
+        """Remember the pinned tracker message so a restart can reuse it."""
+        self.tracker_message_id = message_id
+        self.checkpoint()
+
+    def set_shoe(self, decks):
+        self.deck.shoe = decks
+        self.reset()
+
+    def reset(self):
+        self.current_turn = 0
+        self.encounter_id = None
+        self.deck.reset_deck()
+        self.players.rebuild()
+        self.checkpoint()
+
+    def record(self, event, **payload):
+        if self.store is None:
+            return
+        self.store.log(self.key, event, payload)
+        self.unsaved += 1
+        if self.unsaved >= SNAPSHOT_EVERY or self.deck.shuffles != self.saved_shuffles:
+            self.checkpoint()
+
+    def checkpoint(self):
+        if self.store is not None:
+            self.store.checkpoint(self.key, self.state())
+        self.unsaved = 0
+        self.saved_shuffles = self.deck.shuffles
+
+    def state(self):
+        return {
+            "encounter_id": self.encounter_id,
+            "turn": self.current_turn,
+            "tracker": self.tracker_message_id,
+            "shoe": self.deck.shoe,
+            "decks": self.deck.decks,
+            "cards": list(self.deck.cards),
+            "discards": list(self.deck.discards),
+            "joker_dealt": self.deck.joker_dealt,
+            "players": [
+                [
+                    player.name,
+                    player.health,
+                    player.monster,
+                    list(player.cards),
+                    player.id,
+                ]
+                for player in self.players
+            ],
+        }
+
+    def load(self, state):
+        self.encounter_id = state["encounter_id"]
+        self.current_turn = state["turn"]
+        self.tracker_message_id = state.get("tracker")
+        self.deck.shoe = state.get("shoe", 1)
+        self.deck.decks = state.get("decks", 1)
+        self.deck.cards = list(state["cards"])
+        self.deck.discards = list(state.get("discards", ()))
+        self.deck.joker_dealt = state.get("joker_dealt", False)
+        self.deck.players = CombatantRegistry()
+        for name, health, monster, cards, *combatant_id in state["players"]:
+            player = Player(name, health, monster, *combatant_id)
+            for card in cards:
+                player.deal_card(card, card_key(card))
+            self.deck.players.add(player)
+
+    def apply(self, event, payload):
+        """Replay one journaled event without journaling it again."""
+        if event == "start":
+            self.encounter_id = payload["encounter_id"]
+            self.current_turn = 0
+            self.deck.new_round()
+            self.deck.players = CombatantRegistry(
+                Player(name, health, bool(monster), *combatant_id)
+                for name, health, monster, *combatant_id in payload["players"]
+            )
+        elif event == "deal":
+            self._deal(self.players[payload["player"]], payload["card"])
+        elif event == "sort":
+            self.current_turn = 0
+        elif event == "turn":
+            self.current_turn = payload["turn"]
+
+    def restore(self, snapshot, events):
+        if snapshot is None and not events:
+            # A brand new table: save the freshly shuffled deck.
+            self.checkpoint()
+            return
+
+        if snapshot is not None:
+            self.load(snapshot)
+        for event, payload in events:
+            self.apply(event, payload)
+        self.unsaved = len(events)
+        self.saved_shuffles = self.deck.shuffles
+
+
+class SessionRegistry:
+    """
+    Initiative sessions keyed by (guild id, channel id), created on first use.
+
+    Sessions are kept in least-recently-used order, so evicting the ones idle
+    for longer than ``idle_seconds`` only looks at the stale end.
+    """
+
+    def __init__(self, rng_for=None, store=None, idle_seconds=IDLE_SECONDS):
+        self.rng_for = rng_for
+        self.store = store
+        self.idle_seconds = idle_seconds
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, guild_id, channel_id):
+        key = (guild_id, channel_id)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            session = self._sessions.get(key)
+            if session is None:
+                rng = self.rng_for(key) if self.rng_for else None
+                deck = Deck(rng) if rng is not None else Deck()
+                session = InitiativeSession(key, deck, self.store)
+                self._sessions[key] = session
+            self._sessions.move_to_end(key)
+            session.last_used = now
+            return session
+
+    def peek(self, guild_id, channel_id):
+        """The session if it is already in memory, without creating one."""
+        with self._lock:
+            return self._sessions.get((guild_id, channel_id))
+
+    def discard(self, guild_id, channel_id):
+        with self._lock:
+            return self._sessions.pop((guild_id, channel_id), None)
+
+    def _evict_idle(self, now):
+        while self._sessions:
+            key, session = next(iter(self._sessions.items()))
+            if now - session.last_used < self.idle_seconds:
+                break
+            del self._sessions[key]
+
+    def __len__(self):
+        return len(self._sessions)
@@ -0,0 +1,163 @@
+"""
+Monte Carlo encounter simulator.
+
+A simplified SWADE melee: every round each combatant who is not Shaken
+attacks a random enemy with Fighting against Parry, then rolls Strength
+plus a d6 weapon (another d6 on a raise) against Toughness. A success
+Shakes, each raise is a wound; extras drop at one wound and Wild Cards
+after three. Damage lands at the end of the round.
+
+Thousands of runs are played side by side as NumPy arrays, one batch per
+worker process, so the only Python loop is over rounds and combatants.
+"""
+
+from game.DiceEngine import RAISE_STEP, WILD_DIE_SIDES
+from game.GroupRoll import UNSKILLED, ace, trait_die
+from game.RandomStreams import RandomStream
+from models.CharacterSheet import TraitDie
+import numpy as np
+
+MAX_ROUNDS = 20
+BATCH_RUNS = 500
+WEAPON_DIE = 6
+WILD_WOUNDS = 3
+DRAW = -1
+PARTY = 0
+MONSTERS = 1
+
+
+class Combatant:
+    """The handful of numbers the simulator needs from a character or monster."""
+
+    __slots__ = ("name", "fighting", "strength", "parry", "toughness", "wild")
+
+    def __init__(self, name, fighting, strength, vigor, wild):
+        self.name = name
+        self.fighting = fighting if fighting and fighting.valid else UNSKILLED
+        self.strength = strength if strength and strength.valid else TraitDie("1d4")
+        vigor = vigor if vigor and vigor.valid else TraitDie("1d4")
+        self.parry = 2 + self.fighting.sides // 2
+        self.toughness = 2 + vigor.sides // 2
+        self.wild = wild
+
+    @classmethod
+    def from_sheet(cls, sheet):
+        return cls(
+            sheet.name,
+            sheet.trait("Fighting"),
+            sheet.trait("Strength"),
+            sheet.trait("Vigor"),
+            wild=True,
+        )
+
+    @classmethod
+    def from_monster(cls, row):
+        return cls(
+            row[1],
+            trait_die(row, "Fighting"),
+            trait_die(row, "Strength"),
+            trait_die(row, "Vigor"),
+            wild=False,
+        )
+
+
+def roll_trait(rng, die, runs, wild=False):
+    totals = ace(rng, die.sides, (runs, die.dice))[0].sum(axis=1)
+    if wild:
+        totals = np.maximum(totals, ace(rng, WILD_DIE_SIDES, runs)[0])
+    return totals + die.modifier
+
+
+def simulate_batch(party, monsters, runs, seed):
+    """
+    Play ``runs`` fights of party against monsters. Returns arrays of the
+    winner (PARTY, MONSTERS or DRAW), rounds fought and party casualties.
+    """
+    rng = RandomStream(seed)
+    teams = (party, monsters)
+    parry = [np.array([c.parry for c in team]) for team in teams]
+    toughness = [np.array([c.toughness for c in team]) for team in teams]
+    limit = [np.array([WILD_WOUNDS if c.wild else 0 for c in team]) for team in teams]
+    wounds = [np.zeros((runs, len(team)), dtype=np.int64) for team in teams]
+    shaken = [np.zeros((runs, len(team)), dtype=bool) for team in teams]
+    alive = [np.ones((runs, len(team)), dtype=bool) for team in teams]
+
+    runs_index = np.arange(runs)
+    winner = np.full(runs, DRAW)
+    rounds = np.zeros(runs, dtype=np.int64)
+    active = np.ones(runs, dtype=bool)
+
+    for round_number in range(1, MAX_ROUNDS + 1):
+        dealt = [np.zeros_like(w) for w in wounds]
+        hit = [np.zeros_like(s) for s in shaken]
+
+        for side, team in enumerate(teams):
+            foe = 1 - side
+            foe_alive = alive[foe]
+            ready = active & foe_alive.any(axis=1)
+            for index, fighter in enumerate(team):
+                attacking = ready & alive[side][:, index] & ~shaken[side][:, index]
+                if not attacking.any():
+                    continue
+
+                # A uniformly random living enemy in every run.
+                pick = np.where(foe_alive, rng.integers(1, 1 << 30, foe_alive.shape), 0)
+                target = pick.argmax(axis=1)
+
+                attack = roll_trait(rng, fighter.fighting, runs, fighter.wild)
+                defense = parry[foe][target]
+                landed = attacking & (attack >= defense)
+                damage = roll_trait(rng, fighter.strength, runs)
+                damage += ace(rng, WEAPON_DIE, runs)[0]
+                damage += np.where(
+                    attack >= defense + RAISE_STEP, ace(rng, WEAPON_DIE, runs)[0], 0
+                )
+
+                margin = damage - toughness[foe][target]
+                success = landed & (margin >= 0)
+                raises = np.where(success, margin // RAISE_STEP, 0)
+                # A second Shaken result on a Shaken target becomes a wound.
+                raises = np.where(
+                    success & (raises == 0) & shaken[foe][runs_index, target], 1, raises
+                )
+                dealt[foe][runs_index, target] += raises
+                hit[foe][runs_index, target] |= success
+
+        for side in (PARTY, MONSTERS):
+            wounds[side] += dealt[side]
+            alive[side] = wounds[side] <= limit[side]
+            shaken[side] = hit[side] & alive[side]
+
+        rounds[active] = round_number
+        party_up = alive[PARTY].any(axis=1)
+        monsters_up = alive[MONSTERS].any(axis=1)
+        over = active & ~(party_up & monsters_up)
+        winner[over & party_up] = PARTY
+        winner[over & monsters_up] = MONSTERS
+        active &= ~over
+        if not active.any():
+            break
+
+    casualties = (~alive[PARTY]).sum(axis=1)
+    return winner, rounds, casualties
+
+
+def batches(runs, batch_runs=BATCH_RUNS):
+    full, rest = divmod(runs, batch_runs)
+    return [batch_runs] * full + ([rest] if rest else [])
+
+
+def summarize(results, party_size):
+    """Combine batch results into win rate, mean rounds and casualty odds."""
+    winner = np.concatenate([result[0] for result in results])
+    rounds = np.concatenate([result[1] for result in results])
+    casualties = np.concatenate([result[2] for result in results])
+    runs = len(winner)
+    return {
+        "runs": runs,
+        "win_rate": float((winner == PARTY).mean()),
+        "loss_rate": float((winner == MONSTERS).mean()),
+        "draw_rate": float((winner == DRAW).mean()),
+        "expected_rounds": float(rounds.mean()),
+        "casualties": (np.bincount(casualties, minlength=party_size + 1) / runs).tolist(),
+    }
@@ -1,5 +1,6 @@
 from dotenv import load_dotenv
 from discord.ext import commands
+from models.Database import Database
 import asyncio
 import discord
 import json
@@ -59,8 +60,18 @@ async def on_ready():
 
 
 async def main():
-    await load_cogs()
-    await bot.start(TOKEN)
-
-
-asyncio.run(main())
+    # Closing the bot unloads every cog, which lets them flush buffered
+    # writes (such as the roll history) before the database is closed.
+    async with bot:
+        await load_cogs()
+        await bot.start(TOKEN)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass  # SIGINT is the container stop signal.
+    finally:
+        # Flush any queued group-commit writes before the process exits.
+        Database.close_all()
@@ -0,0 +1,31 @@
+class AsyncModel:
+    """
+    Awaitable facade over a model.
+
+    Every method call is sent to the database executors so cogs never block
+    the event loop on SQLite: methods marked with ``@writes`` run on the single
+    writer thread, everything else runs on the read pool.
+
+        character = AsyncModel(Character())
+        row = await character.read(player_id, name)
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.db = model.db
+
+    def __getattr__(self, name):
+        method = getattr(self.model, name)
+        if not callable(method):
+            return method
+
+        if getattr(method, "writes", False):
+            run = self.db.run_write
+        else:
+            run = self.db.run_read
+
+        async def call(*args, **kwargs):
+            return await run(method, *args, **kwargs)
+
+        call.__name__ = name
+        return call
@@ -0,0 +1,197 @@
+from collections import Counter
+from models.Database import Database, writes
+from models.Queries import (
+    BENNY_BALANCE,
+    BENNY_DEBIT,
+    BENNY_HISTORY,
+    BENNY_USER_HISTORY,
+    CAMPAIGN,
+)
+import time
+
+BANK = 0  # benny_balances holder of the GM's bank; Discord ids are never 0.
+DEFAULT_CAMPAIGN = "default"
+
+
+class InsufficientBennies(ValueError):
+    """Raised when the bank or a player cannot cover a benny debit."""
+
+    def __init__(self, holder, balance, amount):
+        if holder == BANK:
+            message = "Insufficient bennies in the bank."
+        elif balance <= 0:
+            message = "You don't have any bennies to use."
+        else:
+            message = f"You only have {balance} bennies but need {amount}."
+        super().__init__(message)
+        self.holder = holder
+        self.balance = balance
+        self.amount = amount
+
+
+def campaign_name(cur, guild_id):
+    cur.execute(CAMPAIGN, (guild_id,))
+    row = cur.fetchone()
+    return row[0] if row else DEFAULT_CAMPAIGN
+
+
+def open_bank(cur, guild_id, campaign, pool):
+    cur.execute(
+        """INSERT OR IGNORE INTO benny_balances (guild_id, campaign, holder, balance) VALUES(?,?,?,?)""",
+        (guild_id, campaign, BANK, pool),
+    )
+
+
+def credit_bennies(cur, guild_id, campaign, holder, amount):
+    cur.execute(
+        """
+        INSERT INTO benny_balances (guild_id, campaign, holder, balance) VALUES(?,?,?,?)
+        ON CONFLICT(guild_id, campaign, holder) DO UPDATE SET balance = balance + excluded.balance
+        RETURNING balance
+        """,
+        (guild_id, campaign, holder, amount),
+    )
+    return cur.fetchone()[0]
+
+
+def debit_bennies(cur, guild_id, campaign, holder, amount):
+    cur.execute(
+        BENNY_DEBIT,
+        (amount, guild_id, campaign, holder, amount),
+    )
+    row = cur.fetchone()
+    if row is None:
+        raise InsufficientBennies(holder, _balance(cur, guild_id, campaign, holder), amount)
+    return row[0]
+
+
+def record_bennies(cur, guild_id, campaign, event, entries, actor_id=None):
+    """Append (user_id, amount) entries to the ledger as one kind of event."""
+    now = time.time()
+    cur.executemany(
+        """INSERT INTO benny_ledger (guild_id, campaign, event, user_id, amount, actor_id, created_at) VALUES(?,?,?,?,?,?,?)""",
+        [(guild_id, campaign, event, user_id, amount, actor_id, now) for user_id, amount in entries],
+    )
+
+
+def _balance(cur, guild_id, campaign, holder):
+    cur.execute(
+        BENNY_BALANCE,
+        (guild_id, campaign, holder),
+    )
+    row = cur.fetchone()
+    return row[0] if row else 0
+
+
+class Benny:
+    """
+    Bennies of each guild's active campaign.
+
+    benny_ledger is an append-only record of every give and use, and
+    benny_balances holds the resulting balance of the bank and of every
+    player. Both are written in the same transaction, so balances are a
+    single primary-key lookup while the ledger keeps the full history.
+    """
+
+    def __init__(self, pool=0):
+        self.db = Database.get()
+        self.pool = pool  # What a new campaign's bank starts with.
+
+    def campaign(self, guild_id):
+        with self.db.reader() as cur:
+            return campaign_name(cur, guild_id)
+
+    @writes
+    def set_campaign(self, guild_id, name):
+        with self.db.writer() as cur:
+            cur.execute(
+                """INSERT INTO campaigns (guild_id, name) VALUES(?,?) ON CONFLICT(guild_id) DO UPDATE SET name = excluded.name""",
+                (guild_id, name),
+            )
+            open_bank(cur, guild_id, name, self.pool)
+
+    @writes
+    def give(self, guild_id, recipient_id, amount, actor_id=None):
+        """Move bennies from the bank to a player. Returns (bank, player) balances."""
+        if amount <= 0:
+            raise ValueError("Amount must be greater than 0.")
+
+        with self.db.writer() as cur:
+            campaign = campaign_name(cur, guild_id)
+            open_bank(cur, guild_id, campaign, self.pool)
+            bank = debit_bennies(cur, guild_id, campaign, BANK, amount)
+            balance = credit_bennies(cur, guild_id, campaign, recipient_id, amount)
+            record_bennies(cur, guild_id, campaign, "give", [(recipient_id, amount)], actor_id)
+        return bank, balance
+
+    @writes
+    def give_many(self, guild_id, recipient_ids, amount, actor_id=None):
+        """
+        Give every recipient ``amount`` bennies with a single debit of the
+        bank, all in one transaction. A user listed twice (one player with
+        two characters) gets both shares. Nothing is given if the bank cannot
+        cover everyone. Returns (bank, [(user_id, given, balance)]).
+        """
+        if amount <= 0:
+            raise ValueError("Amount must be greater than 0.")
+        shares = Counter(recipient_ids)
+        if not shares:
+            raise ValueError("There is nobody to give bennies to.")
+
+        given = []
+        with self.db.writer() as cur:
+            campaign = campaign_name(cur, guild_id)
+            open_bank(cur, guild_id, campaign, self.pool)
+            bank = debit_bennies(cur, guild_id, campaign, BANK, amount * sum(shares.values()))
+            for user_id, count in shares.items():
+                balance = credit_bennies(cur, guild_id, campaign, user_id, amount * count)
+                given.append((user_id, amount * count, balance))
+            record_bennies(
+                cur,
+                guild_id,
+                campaign,
+                "give",
+                [(user_id, total) for user_id, total, _ in given],
+                actor_id,
+            )
+        return bank, given
+
+    @writes
+    def use(self, guild_id, user_id, amount=1):
+        """Return a player's bennies to the bank. Returns (bank, player) balances."""
+        with self.db.writer() as cur:
+            campaign = campaign_name(cur, guild_id)
+            open_bank(cur, guild_id, campaign, self.pool)
+            balance = debit_bennies(cur, guild_id, campaign, user_id, amount)
+            bank = credit_bennies(cur, guild_id, campaign, BANK, amount)
+            record_bennies(cur, guild_id, campaign, "use", [(user_id, amount)], user_id)
+        return bank, balance
+
+    def balance(self, guild_id, holder):
+        with self.db.reader() as cur:
+            campaign = campaign_name(cur, guild_id)
+            cur.execute(
+                BENNY_BALANCE,
+                (guild_id, campaign, holder),
+            )
+            row = cur.fetchone()
+        if row is not None:
+            return row[0]
+        return self.pool if holder == BANK else 0
+
+    def history(self, guild_id, user_id=None, limit=10):
+        """The latest ledger events of the active campaign, oldest first."""
+        with self.db.reader() as cur:
+            campaign = campaign_name(cur, guild_id)
+            if user_id is None:
+                cur.execute(
+                    BENNY_HISTORY,
+                    (guild_id, campaign, limit),
+                )
+            else:
+                cur.execute(
+                    BENNY_USER_HISTORY,
+                    (guild_id, campaign, user_id, limit),
+                )
+            rows = cur.fetchall()
+        return rows[::-1]
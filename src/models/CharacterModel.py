@@ -1,64 +1,253 @@
-import sqlite3
+from collections import OrderedDict
+from models.CharacterSheet import CharacterSheet
+from models.Database import Database, writes
+from models.Queries import (
+    CHARACTER_CHILDREN,
+    CHARACTER_READ,
+    CHARACTER_READ_ALL,
+    ITEM_OWNERS,
+    PLAYER_CHILDREN,
+)
+import threading
+
+CHILD_TABLES = ("character_attributes", "character_skills", "character_inventory")
+CACHE_SIZE = 256
+
+
+class CharacterNotFound(LookupError):
+    """Raised when a player has no character with the given name."""
+
+    pass
+
+
+def parse_pairs(text):
+    """Parse "Name:Value,Name:Value" into a list of (name, value) pairs."""
+    pairs = []
+    for entry in (text or "").split(","):
+        name, _, value = entry.partition(":")
+        name = name.strip()
+        if name:
+            pairs.append((name, value.strip()))
+    return pairs
+
+
+def parse_quantities(text):
+    """Parse "Item:Amount,Item:Amount" into (item, quantity) pairs."""
+    items = []
+    for name, value in parse_pairs(text):
+        try:
+            items.append((name, int(value)))
+        except ValueError:
+            items.append((name, 1))
+    return items
+
+
+class CharacterCache:
+    """
+    Bounded LRU cache of character sheets keyed by (user_id, lower(name)).
+
+    Writers invalidate entries after their transaction commits. A read that
+    raced with an invalidation is not stored, so the cache never holds a row
+    older than the last committed write.
+    """
+
+    _caches = {}
+    _caches_lock = threading.Lock()
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._rows = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_database(cls, db):
+        with cls._caches_lock:
+            if db.path not in cls._caches:
+                cls._caches[db.path] = cls()
+            return cls._caches[db.path]
+
+    @staticmethod
+    def key(player_id, character_name):
+        return int(player_id), character_name.lower()
+
+    def lookup(self, key):
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                self.misses += 1
+                return None, self._generation
+
+            self.hits += 1
+            self._rows.move_to_end(key)
+            return row, self._generation
+
+    def store(self, key, row, generation):
+        with self._lock:
+            if generation != self._generation:
+                return
+
+            self._rows[key] = row
+            self._rows.move_to_end(key)
+            while len(self._rows) > self.maxsize:
+                self._rows.popitem(last=False)
+
+    def invalidate(self, player_id, character_name):
+        with self._lock:
+            self._generation += 1
+            self._rows.pop(self.key(player_id, character_name), None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._rows.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._rows)}
 
 
 class Character:
     def __init__(self):
-        self.con = sqlite3.connect("swade.db")
-        self.cur = self.con.cursor()
-        self.create_table()
-
-    def create_table(self):
-        self.cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS characters (
-                user_id INTEGER,
-                name TEXT COLLATE NOCASE,
-                health INTEGER,
-                attributes TEXT,
-                skills TEXT,
-                equipment TEXT,
-                money INTEGER
-            )
-            """
-        )
+        self.db = Database.get()
+        self.cache = CharacterCache.for_database(self.db)
 
-    def insert(self, character):
-        self.cur.execute(
-            """INSERT OR IGNORE INTO characters VALUES(?,?,?,?,?,?,?)""", character
-        )
-        self.con.commit()
+    @writes
+    def insert(self, character, attributes=(), skills=(), inventory=()):
+        """Create a character. Returns False if the player already has one by that name."""
+        player_id, character_name = character[0], character[1]
+        with self.db.writer() as cur:
+            cur.execute(
+                """INSERT OR IGNORE INTO characters (user_id,name,health,money) VALUES(?,?,?,?)""",
+                character,
+            )
+            if cur.rowcount == 0:
+                return False
+            self._upsert_children(cur, player_id, character_name, attributes, skills)
+            self._set_inventory(cur, player_id, character_name, inventory)
+            self.db.after_commit(self.cache.invalidate, player_id, character_name)
+        return True
 
     def read(self, player_id, character_name):
-        self.cur.execute(
-            """SELECT * FROM characters WHERE user_id = ? AND name = ? COLLATE NOCASE""",
-            (player_id, character_name),
-        )
-        row = self.cur.fetchone()
-        return row
+        key = CharacterCache.key(player_id, character_name)
+        character, generation = self.cache.lookup(key)
+        if character is not None:
+            return character
+
+        with self.db.reader() as cur:
+            cur.execute(
+                CHARACTER_READ,
+                (player_id, character_name),
+            )
+            row = cur.fetchone()
+            if row is None:
+                return None
+
+            children = self._read_children(cur, CHARACTER_CHILDREN, (row[0], row[1]))
+        character = self._compose(row, children)
+        self.cache.store(key, character, generation)
+        return character
 
     def read_all(self, player_id):
-        self.cur.execute("""SELECT * FROM characters WHERE user_id = ?""", (player_id,))
-        rows = self.cur.fetchall()
-        return rows
+        with self.db.reader() as cur:
+            cur.execute(CHARACTER_READ_ALL, (player_id,))
+            rows = cur.fetchall()
+            children = self._read_children(cur, PLAYER_CHILDREN, (player_id,))
+        return [self._compose(row, children) for row in rows]
+
+    def _read_children(self, cur, queries, params):
+        children = {}
+        for table in CHILD_TABLES:
+            cur.execute(queries[table], params)
+            for user_id, character_name, name, value in cur.fetchall():
+                key = (table, user_id, character_name.lower())
+                children.setdefault(key, []).append((name, value))
+        return children
 
-    def update(self, player_id, character_name, character):
-        self.cur.execute(
-            """
-            UPDATE characters
-            SET health = ?,
-                attributes = ?,
-                skills = ?,
-                equipment = ?,
-                money = ?
-            WHERE user_id = ? AND name = ? COLLATE NOCASE
-            """,
-            (*character, player_id, character_name),
+    def _compose(self, row, children):
+        user_id, name, health, money = row
+        attributes, skills, inventory = (
+            children.get((table, user_id, name.lower()), ()) for table in CHILD_TABLES
         )
-        self.con.commit()
+        return CharacterSheet(user_id, name, health, money, attributes, skills, inventory)
 
+    def owners(self, item_name):
+        with self.db.reader() as cur:
+            cur.execute(
+                ITEM_OWNERS,
+                (item_name,),
+            )
+            rows = cur.fetchall()
+        return rows
+
+    @writes
+    def update(
+        self,
+        player_id,
+        character_name,
+        health,
+        money,
+        attributes=(),
+        skills=(),
+        inventory=(),
+    ):
+        with self.db.writer() as cur:
+            cur.execute(
+                """
+                UPDATE characters
+                SET health = ?,
+                    money = ?
+                WHERE user_id = ? AND name = ? COLLATE NOCASE
+                """,
+                (health, money, player_id, character_name),
+            )
+            if cur.rowcount == 0:
+                raise CharacterNotFound(character_name)
+            self._upsert_children(cur, player_id, character_name, attributes, skills)
+            self._set_inventory(cur, player_id, character_name, inventory)
+            self.db.after_commit(self.cache.invalidate, player_id, character_name)
+
+    def _upsert_children(self, cur, player_id, character_name, attributes, skills):
+        for table, pairs in (
+            ("character_attributes", attributes),
+            ("character_skills", skills),
+        ):
+            cur.executemany(
+                f"""
+                INSERT INTO {table} (user_id, character_name, name, value) VALUES(?,?,?,?)
+                ON CONFLICT(user_id, character_name, name) DO UPDATE SET value = excluded.value
+                """,
+                [(player_id, character_name, name, value) for name, value in pairs],
+            )
+
+    def _set_inventory(self, cur, player_id, character_name, inventory):
+        for item_name, quantity in inventory:
+            if quantity <= 0:
+                cur.execute(
+                    """DELETE FROM character_inventory WHERE user_id = ? AND character_name = ? AND name = ?""",
+                    (player_id, character_name, item_name),
+                )
+            else:
+                cur.execute(
+                    """
+                    INSERT INTO character_inventory (user_id, character_name, name, quantity) VALUES(?,?,?,?)
+                    ON CONFLICT(user_id, character_name, name) DO UPDATE SET quantity = excluded.quantity
+                    """,
+                    (player_id, character_name, item_name, quantity),
+                )
+
+    @writes
     def delete(self, player_id, character_name):
-        self.cur.execute(
-            """DELETE FROM characters WHERE user_id = ? AND name = ? COLLATE NOCASE""",
-            (player_id, character_name),
-        )
-        self.con.commit()
+        with self.db.writer() as cur:
+            cur.execute(
+                """DELETE FROM characters WHERE user_id = ? AND name = ? COLLATE NOCASE""",
+                (player_id, character_name),
+            )
+            for table in CHILD_TABLES:
+                cur.execute(
+                    f"""DELETE FROM {table} WHERE user_id = ? AND character_name = ?""",
+                    (player_id, character_name),
+                )
+            self.db.after_commit(self.cache.invalidate, player_id, character_name)
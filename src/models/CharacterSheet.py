@@ -0,0 +1,75 @@
+import re
+
+TRAIT_DIE_RE = re.compile(r"\s*(\d*)d(\d+)\s*([-+]\s*\d+)?\s*", re.IGNORECASE)
+
+
+class TraitDie:
+    """A trait value such as "1d6+2", parsed once into its parts."""
+
+    __slots__ = ("dice", "sides", "modifier", "text")
+
+    def __init__(self, text):
+        self.text = text
+        match = TRAIT_DIE_RE.fullmatch(text or "")
+        if match is None:
+            # Keep malformed values displayable instead of failing the sheet.
+            self.dice, self.sides, self.modifier = 0, 0, 0
+            return
+
+        self.dice = int(match[1] or 1)
+        self.sides = int(match[2])
+        self.modifier = int(match[3].replace(" ", "")) if match[3] else 0
+
+    @property
+    def valid(self):
+        return self.sides > 0
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f"TraitDie({self.text!r})"
+
+
+class CharacterSheet:
+    """
+    Typed, parse-once view of a character and its child rows.
+
+    Sheets are shared through the character cache, so treat them as
+    read-only; writes go through the models and invalidate the cache.
+    """
+
+    __slots__ = ("user_id", "name", "health", "money", "attributes", "skills", "inventory")
+
+    def __init__(self, user_id, name, health, money, attributes, skills, inventory):
+        self.user_id = user_id
+        self.name = name
+        self.health = health
+        self.money = money
+        self.attributes = {name: TraitDie(value) for name, value in attributes}
+        self.skills = {name: TraitDie(value) for name, value in skills}
+        self.inventory = dict(inventory)
+
+    def trait(self, name):
+        """Case-insensitive lookup of a skill or attribute, or None."""
+        name = name.lower()
+        for traits in (self.skills, self.attributes):
+            for trait, die in traits.items():
+                if trait.lower() == name:
+                    return die
+        return None
+
+    def attribute_lines(self):
+        return [f"{name}:{die}" for name, die in self.attributes.items()]
+
+    def skill_lines(self):
+        return [f"{name}:{die}" for name, die in self.skills.items()]
+
+    def equipment_lines(self):
+        return [
+            f"{item} (x{count})" if count > 1 else item
+            for item, count in self.inventory.items()
+        ]
+
+    def __repr__(self):
+        return f"CharacterSheet({self.user_id!r}, {self.name!r})"
@@ -0,0 +1,257 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from models.Migrations import migrate
+import asyncio
+import functools
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+DATABASE_PATH = "swade.db"
+POOL_SIZE = 4
+
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",  # ~16 MB page cache per connection
+    "PRAGMA mmap_size = 268435456",  # 256 MB memory-mapped I/O
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+
+
+def writes(method):
+    """Mark a model method as a write so the async facade serializes it."""
+    method.writes = True
+    return method
+
+
+class Database:
+    """
+    Owns every SQLite connection of the bot process.
+
+    Reads borrow a connection from a small bounded pool, writes go through a
+    single dedicated writer connection so commits never contend with each
+    other inside the process. With group commit enabled, queued writes share
+    one transaction per batch and their awaitables resolve once it commits.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self,
+        path=DATABASE_PATH,
+        pool_size=POOL_SIZE,
+        group_commit_ms=None,
+        group_commit_size=None,
+    ):
+        # Group commit: when DB_GROUP_COMMIT_MS is above zero, writes from every
+        # cog are queued and committed together every N ms or M statements.
+        if group_commit_ms is None:
+            group_commit_ms = int(os.getenv("DB_GROUP_COMMIT_MS", "0"))
+        if group_commit_size is None:
+            group_commit_size = int(os.getenv("DB_GROUP_COMMIT_SIZE", "64"))
+
+        self.path = path
+        self.pool_size = pool_size
+        self.group_commit_ms = group_commit_ms
+        self.group_commit_size = group_commit_size
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._pool_lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._write_depth = 0
+        self._after_commit = []
+        self._write_con = self.connect()
+        self.read_executor = ThreadPoolExecutor(
+            max_workers=pool_size, thread_name_prefix="swade-db-read"
+        )
+        self.write_executor = None
+        self._write_queue = None
+        self._commit_thread = None
+        if group_commit_ms > 0:
+            self._write_queue = queue.Queue()
+            self._commit_thread = threading.Thread(
+                target=self._drain_writes, name="swade-db-commit", daemon=True
+            )
+            self._commit_thread.start()
+        else:
+            self.write_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="swade-db-write"
+            )
+        migrate(self)
+
+    @classmethod
+    def get(cls, path=None):
+        path = path or os.getenv("DATABASE_PATH", DATABASE_PATH)
+        with cls._instances_lock:
+            if path not in cls._instances:
+                cls._instances[path] = cls(path)
+            return cls._instances[path]
+
+    def connect(self, readonly=False):
+        con = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        for pragma in PRAGMAS:
+            con.execute(pragma)
+        if readonly:
+            con.execute("PRAGMA query_only = ON")
+        return con
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._pool_lock:
+            if self._opened < self.pool_size:
+                self._opened += 1
+                return self.connect(readonly=True)
+
+        return self._idle.get()
+
+    @contextmanager
+    def reader(self):
+        con = self._acquire()
+        try:
+            yield con.cursor()
+        finally:
+            if con.in_transaction:
+                # Never pool a connection that still pins a WAL snapshot.
+                con.rollback()
+            self._idle.put(con)
+
+    @contextmanager
+    def writer(self):
+        # Nested writers (a model call inside a group-commit batch) become
+        # savepoints so a failing statement only rolls back its own work.
+        with self._write_lock:
+            cur = self._write_con.cursor()
+            depth = self._write_depth
+            if depth:
+                cur.execute(f"SAVEPOINT write_{depth}")
+            else:
+                cur.execute("BEGIN IMMEDIATE")
+            self._write_depth += 1
+            try:
+                yield cur
+            except BaseException:
+                if depth:
+                    cur.execute(f"ROLLBACK TO write_{depth}")
+                    cur.execute(f"RELEASE write_{depth}")
+                else:
+                    cur.execute("ROLLBACK")
+                    self._after_commit.clear()
+                raise
+            else:
+                if depth:
+                    cur.execute(f"RELEASE write_{depth}")
+                else:
+                    cur.execute("COMMIT")
+                    callbacks, self._after_commit = self._after_commit, []
+                    for callback in callbacks:
+                        callback()
+            finally:
+                self._write_depth -= 1
+
+    def after_commit(self, fn, *args):
+        """Run fn once the current write transaction has committed."""
+        self._after_commit.append(functools.partial(fn, *args))
+
+    def submit_write(self, fn, *args, **kwargs):
+        call = functools.partial(fn, *args, **kwargs)
+        if self._write_queue is None:
+            return self.write_executor.submit(call)
+
+        future = Future()
+        self._write_queue.put((future, call))
+        return future
+
+    def _drain_writes(self):
+        while True:
+            job = self._write_queue.get()
+            if job is None:
+                return
+
+            batch = [job]
+            stop = False
+            deadline = time.monotonic() + self.group_commit_ms / 1000
+            while len(batch) < self.group_commit_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    job = self._write_queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if job is None:
+                    stop = True
+                    break
+                batch.append(job)
+
+            self._commit_batch(batch)
+            if stop:
+                return
+
+    def _commit_batch(self, batch):
+        outcomes = []
+        try:
+            with self.writer():
+                for future, call in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with self.writer():
+                            outcomes.append((future, call(), None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+        except Exception as e:
+            for future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        # Only acknowledge once the whole batch is committed.
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def flush(self):
+        """Block until every write queued so far is committed."""
+        self.submit_write(lambda: None).result()
+
+    async def run_read(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        call = functools.partial(fn, *args, **kwargs)
+        return await loop.run_in_executor(self.read_executor, call)
+
+    async def run_write(self, fn, *args, **kwargs):
+        return await asyncio.wrap_future(self.submit_write(fn, *args, **kwargs))
+
+    @classmethod
+    def close_all(cls):
+        for database in list(cls._instances.values()):
+            database.close()
+
+    def close(self):
+        if self._write_queue is not None:
+            self._write_queue.put(None)
+            self._commit_thread.join()
+        else:
+            self.write_executor.shutdown(wait=True)
+        self.read_executor.shutdown(wait=True)
+        with self._write_lock:
+            self._write_con.close()
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with Database._instances_lock:
+            if Database._instances.get(self.path) is self:
+                del Database._instances[self.path]
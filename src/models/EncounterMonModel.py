@@ -1,51 +1,44 @@
-import sqlite3
+from models.Database import Database, writes
+from models.Queries import ENCOUNTER_MONSTER_DELETE, ENCOUNTER_MONSTERS
 
 
 class EncounterMon:
     def __init__(self):
-        self.con = sqlite3.connect("swade.db")
-        self.cur = self.con.cursor()
-        self.create_table()
-
-    def create_table(self):
-        self.cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS encounter_monsters (
-                encounter_id INTEGER,
-                monster_id INTEGER,
-                FOREIGN KEY(encounter_id) REFERENCES encounters(id)
-                FOREIGN KEY(monster_id) REFERENCES monsters(id)
-            )
-            """
-        )
+        self.db = Database.get()
 
+    @writes
     def insert(self, encounter_monster):
-        self.cur.execute(
-            """INSERT OR IGNORE INTO encounter_monsters VALUES(?,?)""",
-            encounter_monster,
-        )
-        self.con.commit()
+        with self.db.writer() as cur:
+            cur.execute(
+                """INSERT OR IGNORE INTO encounter_monsters VALUES(?,?)""",
+                encounter_monster,
+            )
 
     def read(self, encounter_id):
-        self.cur.execute("SELECT name FROM encounters WHERE id = ?", (encounter_id,))
-        row = self.cur.fetchone()
-        encounter_name = row[0] if row else None
-
-        self.cur.execute(
-            """SELECT * FROM monsters WHERE id IN (SELECT monster_id FROM encounter_monsters WHERE encounter_id = ?)""",
-            (encounter_id,),
-        )
-        rows = self.cur.fetchall()
+        with self.db.reader() as cur:
+            cur.execute("SELECT name FROM encounters WHERE id = ?", (encounter_id,))
+            row = cur.fetchone()
+            encounter_name = row[0] if row else None
+
+            # One row per roster entry, so a monster added thirty times is a
+            # mob of thirty.
+            cur.execute(
+                ENCOUNTER_MONSTERS,
+                (encounter_id,),
+            )
+            rows = cur.fetchall()
         return encounter_name, rows
 
     def read_all(self):
-        self.cur.execute("""SELECT * FROM encounter_monsters""")
-        rows = self.cur.fetchall()
+        with self.db.reader() as cur:
+            cur.execute("""SELECT * FROM encounter_monsters""")
+            rows = cur.fetchall()
         return rows
 
+    @writes
     def delete(self, encounter_monster):
-        self.cur.execute(
-            """DELETE FROM encounter_monsters WHERE encounter_id = ? AND monster_id = ?""",
-            encounter_monster,
-        )
-        self.con.commit()
+        with self.db.writer() as cur:
+            cur.execute(
+                ENCOUNTER_MONSTER_DELETE,
+                encounter_monster,
+            )
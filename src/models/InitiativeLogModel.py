@@ -0,0 +1,84 @@
+from models.Database import Database, writes
+from models.Queries import INITIATIVE_EVENTS, INITIATIVE_SNAPSHOT
+import json
+import time
+
+
+def _encode(value):
+    return json.dumps(value, separators=(",", ":"))
+
+
+class InitiativeLog:
+    """
+    Journal of initiative sessions: an append-only event log per
+    (guild, channel) plus its latest snapshot. Taking a snapshot drops the
+    events it already covers, so a restore reads one snapshot and a short
+    tail of events.
+    """
+
+    def __init__(self):
+        self.db = Database.get()
+
+    @writes
+    def append(self, guild_id, channel_id, event, payload):
+        with self.db.writer() as cur:
+            cur.execute(
+                """INSERT INTO initiative_log (guild_id, channel_id, event, payload, created_at) VALUES(?,?,?,?,?)""",
+                (guild_id, channel_id, event, payload, time.time()),
+            )
+
+    @writes
+    def snapshot(self, guild_id, channel_id, state):
+        with self.db.writer() as cur:
+            cur.execute(
+                """SELECT coalesce(max(id), 0) FROM initiative_log WHERE guild_id = ? AND channel_id = ?""",
+                (guild_id, channel_id),
+            )
+            log_id = cur.fetchone()[0]
+            cur.execute(
+                """
+                INSERT INTO initiative_snapshots (guild_id, channel_id, log_id, state, created_at) VALUES(?,?,?,?,?)
+                ON CONFLICT(guild_id, channel_id) DO UPDATE SET
+                    log_id = excluded.log_id,
+                    state = excluded.state,
+                    created_at = excluded.created_at
+                """,
+                (guild_id, channel_id, log_id, state, time.time()),
+            )
+            cur.execute(
+                """DELETE FROM initiative_log WHERE guild_id = ? AND channel_id = ? AND id <= ?""",
+                (guild_id, channel_id, log_id),
+            )
+
+    def log(self, key, event, payload):
+        """Queue an event for the writer without waiting for it to commit."""
+        self.db.submit_write(self.append, *key, event, _encode(payload))
+
+    def checkpoint(self, key, state):
+        """Queue a snapshot for the writer without waiting for it to commit."""
+        self.db.submit_write(self.snapshot, *key, _encode(state))
+
+    def read(self, guild_id, channel_id):
+        with self.db.reader() as cur:
+            # One read transaction, so a concurrent snapshot cannot prune
+            # events between the two queries.
+            cur.execute("BEGIN")
+            try:
+                cur.execute(
+                    INITIATIVE_SNAPSHOT,
+                    (guild_id, channel_id),
+                )
+                row = cur.fetchone()
+                log_id, snapshot = (row[0], json.loads(row[1])) if row else (0, None)
+
+                cur.execute(
+                    INITIATIVE_EVENTS,
+                    (guild_id, channel_id, log_id),
+                )
+                events = [(event, json.loads(payload)) for event, payload in cur.fetchall()]
+            except BaseException:
+                cur.execute("ROLLBACK")
+                raise
+            else:
+                cur.execute("COMMIT")
+        return snapshot, events
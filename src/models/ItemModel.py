@@ -1,64 +1,112 @@
-import sqlite3
+from models.CharacterModel import CharacterCache, CharacterNotFound
+from models.Database import Database, writes
+from models.MoneyModel import debit_money, read_balance
+from models.Queries import INVENTORY_QUANTITY, ITEM_PRICE, ITEM_READ, MONEY_READ
+
+
+class ItemNotFound(LookupError):
+    """Raised when an item is not sold in the store."""
+
+    pass
+
+
+class QuantityLimitExceeded(ValueError):
+    """Raised when a purchase would take a character over the item limit."""
+
+    def __init__(self, item_name, owned, limit):
+        super().__init__(f"Cannot own more than {limit} of {item_name}.")
+        self.item_name = item_name
+        self.owned = owned
+        self.limit = limit
 
 
 class Item:
     def __init__(self):
-        self.con = sqlite3.connect("swade.db")
-        self.cur = self.con.cursor()
-        self.create_table()
-
-    def create_table(self):
-        self.cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS items (
-                id INTEGER PRIMARY KEY,
-                name TEXT COLLATE NOCASE,
-                category TEXT COLLATE NOCASE,
-                price INTEGER,
-                UNIQUE(id, name)
-            )
-            """
-        )
+        self.db = Database.get()
+        self.cache = CharacterCache.for_database(self.db)
 
+    @writes
     def insert(self, item):
-        self.cur.execute(
-            """INSERT OR REPLACE INTO items (name,category,price) VALUES(?,?,?)""", item
-        )
-        self.con.commit()
+        with self.db.writer() as cur:
+            cur.execute(
+                """INSERT OR REPLACE INTO items (name,category,price) VALUES(?,?,?)""",
+                item,
+            )
 
     def read(self, item_name):
-        self.cur.execute("""SELECT * FROM items WHERE name = ?""", (item_name,))
-        row = self.cur.fetchone()
+        with self.db.reader() as cur:
+            cur.execute(ITEM_READ, (item_name,))
+            row = cur.fetchone()
         return row
 
     def read_all(self):
-        self.cur.execute("""SELECT * FROM items""")
-        rows = self.cur.fetchall()
+        with self.db.reader() as cur:
+            cur.execute("""SELECT * FROM items""")
+            rows = cur.fetchall()
         return rows
 
+    @writes
     def delete(self, item_name):
-        self.cur.execute("""DELETE FROM items WHERE name = ?""", (item_name,))
-        self.con.commit()
-
-    def buy(self, player_id, character_name):
-        self.cur.execute(
-            """SELECT money, equipment FROM characters WHERE user_id = ? AND name = ? COLLATE NOCASE""",
-            (player_id, character_name),
-        )
-        row = self.cur.fetchone()
-        return row
+        with self.db.writer() as cur:
+            cur.execute("""DELETE FROM items WHERE name = ?""", (item_name,))
 
-    def update(self, character):
-        self.cur.execute(
-            """UPDATE characters SET money = ?, equipment = ? WHERE user_id = ? AND name = ? COLLATE NOCASE""",
-            character,
-        )
-        self.con.commit()
+    @writes
+    def purchase(self, player_id, character_name, item_name, quantity, limit=100):
+        """
+        Debit the character and add the items to their inventory in one
+        transaction. Returns (money left, units owned).
+        """
+        if quantity < 1:
+            raise ValueError("Quantity must be greater than 0.")
+
+        with self.db.writer() as cur:
+            cur.execute(ITEM_PRICE, (item_name,))
+            item = cur.fetchone()
+            if item is None:
+                raise ItemNotFound(item_name)
+
+            if quantity > limit:
+                raise QuantityLimitExceeded(item[0], 0, limit)
+
+            cost = item[1] * quantity
+            if cost > 0:
+                money = debit_money(cur, player_id, character_name, cost)
+            else:
+                # Free items cost nothing, but the character must still exist.
+                money = read_balance(cur, player_id, character_name)
+                if money is None:
+                    raise CharacterNotFound(character_name)
+
+            cur.execute(
+                """
+                INSERT INTO character_inventory (user_id, character_name, name, quantity) VALUES(?,?,?,?)
+                ON CONFLICT(user_id, character_name, name) DO UPDATE SET quantity = quantity + excluded.quantity
+                WHERE quantity + excluded.quantity <= ?
+                RETURNING quantity
+                """,
+                (player_id, character_name, item[0], quantity, limit),
+            )
+            row = cur.fetchone()
+            if row is None:
+                cur.execute(
+                    INVENTORY_QUANTITY,
+                    (player_id, character_name, item[0]),
+                )
+                raise QuantityLimitExceeded(item[0], cur.fetchone()[0], limit)
+
+            self.db.after_commit(self.cache.invalidate, player_id, character_name)
+
+        return money, row[0]
 
     def money(self, player_id, character_name):
-        self.cur.execute(
-            """SELECT money FROM characters WHERE user_id = ? AND name = ? COLLATE NOCASE""",
-            (player_id, character_name),
-        )
-        row = self.cur.fetchone()
+        character, _ = self.cache.lookup(CharacterCache.key(player_id, character_name))
+        if character is not None:
+            return (character.money,)
+
+        with self.db.reader() as cur:
+            cur.execute(
+                MONEY_READ,
+                (player_id, character_name),
+            )
+            row = cur.fetchone()
         return row
@@ -0,0 +1,387 @@
+"""
+Versioned schema migrations for swade.db.
+
+Each migration runs once, in its own transaction, and bumps
+``PRAGMA user_version`` so existing databases are evolved in place.
+"""
+
+from models.Queries import HOT_QUERIES
+
+
+def _split_pairs(text):
+    for entry in (text or "").split(","):
+        name, _, value = entry.partition(":")
+        if name.strip():
+            yield name.strip(), value.strip()
+
+
+def split_character_columns(cur):
+    cur.execute("SELECT user_id, name, attributes, skills, equipment FROM characters")
+    for user_id, name, attributes, skills, equipment in cur.fetchall():
+        for table, text in (
+            ("character_attributes", attributes),
+            ("character_skills", skills),
+        ):
+            cur.executemany(
+                f"""INSERT OR REPLACE INTO {table} (user_id, character_name, name, value) VALUES(?,?,?,?)""",
+                [(user_id, name, key, value) for key, value in _split_pairs(text)],
+            )
+
+        inventory = []
+        for item, quantity in _split_pairs(equipment):
+            quantity = int(quantity) if quantity.isdigit() else 1
+            if quantity > 0:
+                inventory.append((user_id, name, item, quantity))
+        cur.executemany(
+            """INSERT OR REPLACE INTO character_inventory (user_id, character_name, name, quantity) VALUES(?,?,?,?)""",
+            inventory,
+        )
+
+
+MIGRATIONS = [
+    (
+        1,
+        "base schema",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS characters (
+                user_id INTEGER,
+                name TEXT COLLATE NOCASE,
+                health INTEGER,
+                attributes TEXT,
+                skills TEXT,
+                equipment TEXT,
+                money INTEGER
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS encounters (
+                id INTEGER PRIMARY KEY,
+                name TEXT COLLATE NOCASE,
+                UNIQUE(id)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS encounter_characters (
+                encounter_id INTEGER,
+                player_id INTEGER,
+                character_name TEXT COLLATE NOCASE,
+                FOREIGN KEY(encounter_id) REFERENCES encounters(id),
+                FOREIGN KEY(player_id) REFERENCES characters(user_id)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS monsters (
+                id INTEGER PRIMARY KEY,
+                name TEXT COLLATE NOCASE,
+                health INTEGER,
+                attributes TEXT,
+                skills TEXT,
+                equipment TEXT,
+                money INTEGER,
+                UNIQUE(id)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS encounter_monsters (
+                encounter_id INTEGER,
+                monster_id INTEGER,
+                FOREIGN KEY(encounter_id) REFERENCES encounters(id)
+                FOREIGN KEY(monster_id) REFERENCES monsters(id)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS items (
+                id INTEGER PRIMARY KEY,
+                name TEXT COLLATE NOCASE,
+                category TEXT COLLATE NOCASE,
+                price INTEGER,
+                UNIQUE(id, name)
+            )
+            """,
+        ),
+    ),
+    (
+        2,
+        "lookup indexes",
+        (
+            """
+            CREATE INDEX IF NOT EXISTS idx_characters_user_name
+            ON characters(user_id, name COLLATE NOCASE)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_encounter_characters_roster
+            ON encounter_characters(encounter_id, player_id, character_name COLLATE NOCASE)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_encounter_monsters_roster
+            ON encounter_monsters(encounter_id, monster_id)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_items_name
+            ON items(name COLLATE NOCASE)
+            """,
+        ),
+    ),
+    (
+        3,
+        "character child tables",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS character_attributes (
+                user_id INTEGER NOT NULL,
+                character_name TEXT NOT NULL COLLATE NOCASE,
+                name TEXT NOT NULL COLLATE NOCASE,
+                value TEXT,
+                UNIQUE(user_id, character_name, name)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS character_skills (
+                user_id INTEGER NOT NULL,
+                character_name TEXT NOT NULL COLLATE NOCASE,
+                name TEXT NOT NULL COLLATE NOCASE,
+                value TEXT,
+                UNIQUE(user_id, character_name, name)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS character_inventory (
+                user_id INTEGER NOT NULL,
+                character_name TEXT NOT NULL COLLATE NOCASE,
+                name TEXT NOT NULL COLLATE NOCASE,
+                quantity INTEGER NOT NULL,
+                UNIQUE(user_id, character_name, name)
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_character_inventory_name
+            ON character_inventory(name)
+            """,
+            split_character_columns,
+            "ALTER TABLE characters DROP COLUMN attributes",
+            "ALTER TABLE characters DROP COLUMN skills",
+            "ALTER TABLE characters DROP COLUMN equipment",
+        ),
+    ),
+    (
+        4,
+        "unique encounter roster",
+        (
+            """
+            DELETE FROM encounter_characters WHERE rowid NOT IN (
+                SELECT min(rowid) FROM encounter_characters
+                GROUP BY encounter_id, player_id, character_name
+            )
+            """,
+            "DROP INDEX IF EXISTS idx_encounter_characters_roster",
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_encounter_characters_roster
+            ON encounter_characters(encounter_id, player_id, character_name COLLATE NOCASE)
+            """,
+        ),
+    ),
+    (
+        5,
+        "rng seed log",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS rng_seeds (
+                id INTEGER PRIMARY KEY,
+                scope TEXT NOT NULL,
+                seed INTEGER NOT NULL,
+                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_rng_seeds_scope
+            ON rng_seeds(scope, id)
+            """,
+        ),
+    ),
+    (
+        6,
+        "roll history",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS roll_history (
+                id INTEGER PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                channel_id INTEGER NOT NULL,
+                expression TEXT NOT NULL,
+                dice TEXT NOT NULL,
+                total INTEGER NOT NULL,
+                rolled_at REAL NOT NULL
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_roll_history_channel
+            ON roll_history(channel_id, id)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_roll_history_user
+            ON roll_history(user_id, id)
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS roll_stats (
+                user_id INTEGER NOT NULL,
+                sides INTEGER NOT NULL,
+                rolls INTEGER NOT NULL DEFAULT 0,
+                total INTEGER NOT NULL DEFAULT 0,
+                aces INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, sides)
+            ) WITHOUT ROWID
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS roll_faces (
+                user_id INTEGER NOT NULL,
+                sides INTEGER NOT NULL,
+                face INTEGER NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, sides, face)
+            ) WITHOUT ROWID
+            """,
+        ),
+    ),
+    (
+        7,
+        "initiative journal",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS initiative_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,  -- ids must never be reused after pruning
+                guild_id INTEGER NOT NULL,
+                channel_id INTEGER NOT NULL,
+                event TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_initiative_log_session
+            ON initiative_log(guild_id, channel_id, id)
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS initiative_snapshots (
+                guild_id INTEGER NOT NULL,
+                channel_id INTEGER NOT NULL,
+                log_id INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (guild_id, channel_id)
+            ) WITHOUT ROWID
+            """,
+        ),
+    ),
+    (
+        8,
+        "benny ledger",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS campaigns (
+                guild_id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS benny_ledger (
+                id INTEGER PRIMARY KEY,
+                guild_id INTEGER NOT NULL,
+                campaign TEXT NOT NULL,
+                event TEXT NOT NULL,
+                user_id INTEGER NOT NULL,
+                amount INTEGER NOT NULL,
+                actor_id INTEGER,
+                created_at REAL NOT NULL
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_benny_ledger_campaign
+            ON benny_ledger(guild_id, campaign, id)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_benny_ledger_user
+            ON benny_ledger(guild_id, campaign, user_id, id)
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS benny_balances (
+                guild_id INTEGER NOT NULL,
+                campaign TEXT NOT NULL,
+                holder INTEGER NOT NULL,  -- a user id, or 0 for the bank
+                balance INTEGER NOT NULL CHECK (balance >= 0),
+                PRIMARY KEY (guild_id, campaign, holder)
+            ) WITHOUT ROWID
+            """,
+        ),
+    ),
+    (
+        9,
+        "unique character names",
+        (
+            """
+            DELETE FROM characters WHERE rowid NOT IN (
+                SELECT min(rowid) FROM characters
+                GROUP BY user_id, name COLLATE NOCASE
+            )
+            """,
+            "DROP INDEX IF EXISTS idx_characters_user_name",
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_characters_user_name
+            ON characters(user_id, name COLLATE NOCASE)
+            """,
+        ),
+    ),
+]
+
+
+class QueryPlanError(AssertionError):
+    """Raised when a hot query is planned as a full table scan."""
+
+    pass
+
+
+def schema_version(cur):
+    cur.execute("PRAGMA user_version")
+    return cur.fetchone()[0]
+
+
+def migrate(db):
+    with db.reader() as cur:
+        version = schema_version(cur)
+
+    for target, name, steps in MIGRATIONS:
+        if target <= version:
+            continue
+
+        with db.writer() as cur:
+            # Another process may have migrated since the version was read;
+            # BEGIN IMMEDIATE holds the write lock, so this read is final.
+            version = schema_version(cur)
+            if target <= version:
+                continue
+            for step in steps:
+                if callable(step):
+                    step(cur)
+                else:
+                    cur.execute(step)
+            cur.execute(f"PRAGMA user_version = {target}")
+
+        print(f"Migrated swade.db to version {target}: {name}")
+
+
+def explain(cur, query):
+    params = (None,) * query.count("?")
+    cur.execute(f"EXPLAIN QUERY PLAN {query}", params)
+    return [row[3] for row in cur.fetchall()]
+
+
+def check_query_plans(cur, queries=HOT_QUERIES):
+    # EXPLAIN never opens a read transaction, so touch the schema first to
+    # make a long-lived connection reload it after a migration.
+    cur.execute("SELECT count(*) FROM sqlite_master").fetchone()
+
+    for name, query in queries.items():
+        plan = explain(cur, query)
+        scans = [step for step in plan if step.startswith("SCAN")]
+        if scans:
+            raise QueryPlanError(f"{name} regressed to a table scan: {'; '.join(scans)}")
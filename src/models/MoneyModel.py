@@ -1,29 +1,119 @@
-import sqlite3
+from models.CharacterModel import CharacterCache, CharacterNotFound
+from models.Database import Database, writes
+from models.Queries import MONEY_CREDIT, MONEY_DEBIT, MONEY_READ
+
+
+class InsufficientFunds(ValueError):
+    """Raised when a character cannot afford a debit."""
+
+    def __init__(self, character_name, balance, amount):
+        super().__init__(f"{character_name} has {balance} but needs {amount}.")
+        self.character_name = character_name
+        self.balance = balance
+        self.amount = amount
+
+
+def check_amount(amount):
+    if amount <= 0:
+        raise ValueError("Amount must be greater than 0.")
+
+
+def credit_money(cur, player_id, character_name, amount):
+    check_amount(amount)
+    cur.execute(
+        MONEY_CREDIT,
+        (amount, player_id, character_name),
+    )
+    row = cur.fetchone()
+    if row is None:
+        raise CharacterNotFound(character_name)
+    return row[0]
+
+
+def debit_money(cur, player_id, character_name, amount):
+    check_amount(amount)
+    cur.execute(
+        MONEY_DEBIT,
+        (amount, player_id, character_name, amount),
+    )
+    row = cur.fetchone()
+    if row is None:
+        balance = read_balance(cur, player_id, character_name)
+        if balance is None:
+            raise CharacterNotFound(character_name)
+        raise InsufficientFunds(character_name, balance, amount)
+    return row[0]
+
+
+def read_balance(cur, player_id, character_name):
+    cur.execute(
+        MONEY_READ,
+        (player_id, character_name),
+    )
+    row = cur.fetchone()
+    return row[0] if row else None
 
 
 class Money:
     def __init__(self):
-        self.con = sqlite3.connect("swade.db")
-        self.cur = self.con.cursor()
-
-    def add(self, player_id, character_name, amount):
-        self.cur.execute(
-            """UPDATE characters SET money = money + ? WHERE user_id = ? AND name= ? COLLATE NOCASE""",
-            (amount, player_id, character_name),
-        )
-        self.con.commit()
-
-    def subtract(self, player_id, character_name, amount):
-        self.cur.execute(
-            """UPDATE characters SET money = money - ? WHERE user_id = ? AND name= ? COLLATE NOCASE""",
-            (amount, player_id, character_name),
-        )
-        self.con.commit()
+        self.db = Database.get()
+        self.cache = CharacterCache.for_database(self.db)
+
+    @writes
+    def credit(self, player_id, character_name, amount):
+        with self.db.writer() as cur:
+            balance = credit_money(cur, player_id, character_name, amount)
+            self.db.after_commit(self.cache.invalidate, player_id, character_name)
+        return balance
+
+    @writes
+    def debit(self, player_id, character_name, amount):
+        with self.db.writer() as cur:
+            balance = debit_money(cur, player_id, character_name, amount)
+            self.db.after_commit(self.cache.invalidate, player_id, character_name)
+        return balance
+
+    @writes
+    def transfer(self, source, target, amount):
+        """
+        Move money between two (player_id, character_name) pairs.
+        Returns the new (source, target) balances.
+        """
+        check_amount(amount)
+        with self.db.writer() as cur:
+            source_balance = debit_money(cur, *source, amount)
+            target_balance = credit_money(cur, *target, amount)
+            self.db.after_commit(self.cache.invalidate, *source)
+            self.db.after_commit(self.cache.invalidate, *target)
+        return source_balance, target_balance
+
+    @writes
+    def settle(self, entries):
+        """
+        Pay (positive amount) or charge (negative amount) every
+        (player_id, character_name, amount) entry in one transaction.
+        Nothing is applied if any entry fails.
+        """
+        balances = []
+        with self.db.writer() as cur:
+            for player_id, character_name, amount in entries:
+                if amount < 0:
+                    balance = debit_money(cur, player_id, character_name, abs(amount))
+                else:
+                    balance = credit_money(cur, player_id, character_name, abs(amount))
+                balances.append(balance)
+                self.db.after_commit(self.cache.invalidate, player_id, character_name)
+        return balances
 
     def read(self, player_id, character_name):
-        self.cur.execute(
-            """SELECT money FROM characters WHERE user_id = ? AND name = ? COLLATE NOCASE""",
-            (player_id, character_name),
-        )
-        row = self.cur.fetchone()
+        character, _ = self.cache.lookup(CharacterCache.key(player_id, character_name))
+        if character is not None:
+            return (character.money,)
+
+        with self.db.reader() as cur:
+            cur.execute(
+                MONEY_READ,
+                (player_id, character_name),
+            )
+            row = cur.fetchone()
         return row
@@ -1,63 +1,50 @@
-import sqlite3
+from models.Database import Database, writes
 
 
 class Monster:
     def __init__(self):
-        self.con = sqlite3.connect("swade.db")
-        self.cur = self.con.cursor()
-        self.create_table()
-
-    def create_table(self):
-        self.cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS monsters (
-                id INTEGER PRIMARY KEY,
-                name TEXT COLLATE NOCASE,
-                health INTEGER,
-                attributes TEXT,
-                skills TEXT,
-                equipment TEXT,
-                money INTEGER,
-                UNIQUE(id)
-            )
-            """
-        )
+        self.db = Database.get()
 
+    @writes
     def insert(self, monster):
-        self.cur.execute(
-            """INSERT OR IGNORE INTO monsters (name,health,attributes,skills,equipment,money) VALUES(?,?,?,?,?,?)""",
-            monster,
-        )
-        self.con.commit()
+        with self.db.writer() as cur:
+            cur.execute(
+                """INSERT OR IGNORE INTO monsters (name,health,attributes,skills,equipment,money) VALUES(?,?,?,?,?,?)""",
+                monster,
+            )
 
     def read(self, monster_id):
-        self.cur.execute("""SELECT * FROM monsters WHERE id = ?""", (monster_id,))
-        row = self.cur.fetchone()
+        with self.db.reader() as cur:
+            cur.execute("""SELECT * FROM monsters WHERE id = ?""", (monster_id,))
+            row = cur.fetchone()
         return row
 
     def read_all(self, monster_id):
-        self.cur.execute("""SELECT * FROM monsters WHERE id = ?""", (monster_id,))
-        rows = self.cur.fetchall()
+        with self.db.reader() as cur:
+            cur.execute("""SELECT * FROM monsters WHERE id = ?""", (monster_id,))
+            rows = cur.fetchall()
         return rows
 
+    @writes
     def update(self, monster_id, monster):
-        self.cur.execute(
-            """
-            UPDATE monsters
-            SET health = ?,
-                attributes = ?,
-                skills = ?,
-                equipment = ?,
-                money = ?
-            WHERE id = ? AND name = ? COLLATE NOCASE
-            """,
-            (
-                *monster,
-                monster_id,
-            ),
-        )
-        self.con.commit()
+        with self.db.writer() as cur:
+            cur.execute(
+                """
+                UPDATE monsters
+                SET health = ?,
+                    attributes = ?,
+                    skills = ?,
+                    equipment = ?,
+                    money = ?
+                WHERE id = ?
+                """,
+                (
+                    *monster,
+                    monster_id,
+                ),
+            )
 
+    @writes
     def delete(self, monster_id):
-        self.cur.execute("""DELETE FROM monsters WHERE id = ?""", (monster_id,))
-        self.con.commit()
+        with self.db.writer() as cur:
+            cur.execute("""DELETE FROM monsters WHERE id = ?""", (monster_id,))
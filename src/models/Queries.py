@@ -0,0 +1,114 @@
+"""
+SQL of the hot paths, shared by the models that run it and by
+check_query_plans() (models/Migrations.py), so the plan check always tests
+the exact statements the bot executes.
+"""
+
+CHARACTER_READ = """SELECT * FROM characters WHERE user_id = ? AND name = ? COLLATE NOCASE"""
+CHARACTER_READ_ALL = """SELECT * FROM characters WHERE user_id = ?"""
+MONEY_READ = """SELECT money FROM characters WHERE user_id = ? AND name = ? COLLATE NOCASE"""
+MONEY_DEBIT = """
+UPDATE characters SET money = money - ?
+WHERE user_id = ? AND name = ? COLLATE NOCASE AND money >= ?
+RETURNING money
+"""
+MONEY_CREDIT = """UPDATE characters SET money = money + ? WHERE user_id = ? AND name = ? COLLATE NOCASE RETURNING money"""
+
+# Child rows of one character, and of every character of a player, per table.
+CHILD_VALUES = {
+    "character_attributes": "value",
+    "character_skills": "value",
+    "character_inventory": "quantity",
+}
+CHARACTER_CHILDREN = {
+    table: f"""SELECT user_id, character_name, name, {value} FROM {table} WHERE user_id = ? AND character_name = ? ORDER BY rowid"""
+    for table, value in CHILD_VALUES.items()
+}
+PLAYER_CHILDREN = {
+    table: f"""SELECT user_id, character_name, name, {value} FROM {table} WHERE user_id = ? ORDER BY rowid"""
+    for table, value in CHILD_VALUES.items()
+}
+
+ITEM_READ = """SELECT * FROM items WHERE name = ?"""
+ITEM_PRICE = """SELECT name, price FROM items WHERE name = ?"""
+ITEM_OWNERS = """SELECT user_id, character_name, quantity FROM character_inventory WHERE name = ?"""
+INVENTORY_QUANTITY = """SELECT quantity FROM character_inventory WHERE user_id = ? AND character_name = ? AND name = ?"""
+
+ENCOUNTER_CHARACTERS = """
+SELECT characters.* FROM encounter_characters
+JOIN characters
+    ON characters.user_id = encounter_characters.player_id
+    AND characters.name = encounter_characters.character_name
+WHERE encounter_characters.encounter_id = ?
+"""
+ENCOUNTER_MONSTERS = """
+SELECT monsters.* FROM encounter_monsters
+JOIN monsters ON monsters.id = encounter_monsters.monster_id
+WHERE encounter_monsters.encounter_id = ?
+"""
+INITIATIVE = """
+SELECT characters.name, characters.health, 0, encounter_characters.player_id
+FROM encounter_characters
+JOIN characters
+    ON characters.user_id = encounter_characters.player_id
+    AND characters.name = encounter_characters.character_name
+WHERE encounter_characters.encounter_id = ?
+UNION ALL
+SELECT monsters.name, monsters.health, 1, monsters.id
+FROM encounter_monsters
+JOIN monsters ON monsters.id = encounter_monsters.monster_id
+WHERE encounter_monsters.encounter_id = ?
+"""
+ENCOUNTER_CHARACTER_DELETE = """DELETE FROM encounter_characters WHERE encounter_id = ? AND player_id = ? AND character_name = ?"""
+ENCOUNTER_MONSTER_DELETE = """DELETE FROM encounter_monsters WHERE encounter_id = ? AND monster_id = ?"""
+
+ROLL_HISTORY = """SELECT user_id, expression, total, rolled_at FROM roll_history WHERE channel_id = ? ORDER BY id DESC LIMIT ?"""
+ROLL_STATS = """SELECT sides, rolls, total, aces FROM roll_stats WHERE user_id = ? ORDER BY sides"""
+ROLL_FACES = """SELECT sides, face, count FROM roll_faces WHERE user_id = ? ORDER BY sides, face"""
+
+INITIATIVE_SNAPSHOT = """SELECT log_id, state FROM initiative_snapshots WHERE guild_id = ? AND channel_id = ?"""
+INITIATIVE_EVENTS = """SELECT event, payload FROM initiative_log WHERE guild_id = ? AND channel_id = ? AND id > ? ORDER BY id"""
+
+RNG_SEEDS = """SELECT id, seed, created_at FROM rng_seeds WHERE scope = ? ORDER BY id DESC LIMIT ?"""
+
+CAMPAIGN = """SELECT name FROM campaigns WHERE guild_id = ?"""
+BENNY_BALANCE = """SELECT balance FROM benny_balances WHERE guild_id = ? AND campaign = ? AND holder = ?"""
+BENNY_DEBIT = """
+UPDATE benny_balances SET balance = balance - ?
+WHERE guild_id = ? AND campaign = ? AND holder = ? AND balance >= ?
+RETURNING balance
+"""
+BENNY_HISTORY = """SELECT event, user_id, amount, actor_id, created_at FROM benny_ledger WHERE guild_id = ? AND campaign = ? ORDER BY id DESC LIMIT ?"""
+BENNY_USER_HISTORY = """SELECT event, user_id, amount, actor_id, created_at FROM benny_ledger WHERE guild_id = ? AND campaign = ? AND user_id = ? ORDER BY id DESC LIMIT ?"""
+
+# Queries on the hot paths of the cogs. check_query_plans() fails if any of
+# them stops using an index and falls back to a full table SCAN.
+HOT_QUERIES = {
+    "character read": CHARACTER_READ,
+    "character read_all": CHARACTER_READ_ALL,
+    "money read": MONEY_READ,
+    "money debit": MONEY_DEBIT,
+    "money credit": MONEY_CREDIT,
+    "item read": ITEM_READ,
+    "item price": ITEM_PRICE,
+    "item owners": ITEM_OWNERS,
+    "inventory quantity": INVENTORY_QUANTITY,
+    "encounter characters": ENCOUNTER_CHARACTERS,
+    "encounter monsters": ENCOUNTER_MONSTERS,
+    "initiative": INITIATIVE,
+    "encounter character delete": ENCOUNTER_CHARACTER_DELETE,
+    "encounter monster delete": ENCOUNTER_MONSTER_DELETE,
+    **{f"{table} of character": query for table, query in CHARACTER_CHILDREN.items()},
+    **{f"{table} of player": query for table, query in PLAYER_CHILDREN.items()},
+    "roll history": ROLL_HISTORY,
+    "roll stats": ROLL_STATS,
+    "roll faces": ROLL_FACES,
+    "initiative snapshot": INITIATIVE_SNAPSHOT,
+    "initiative events": INITIATIVE_EVENTS,
+    "rng seeds": RNG_SEEDS,
+    "campaign": CAMPAIGN,
+    "benny balance": BENNY_BALANCE,
+    "benny debit": BENNY_DEBIT,
+    "benny history": BENNY_HISTORY,
+    "benny user history": BENNY_USER_HISTORY,
+}
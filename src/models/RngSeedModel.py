@@ -0,0 +1,27 @@
+from models.Database import Database, writes
+from models.Queries import RNG_SEEDS
+
+
+class RngSeed:
+    def __init__(self):
+        self.db = Database.get()
+
+    @writes
+    def insert(self, scope, seed):
+        with self.db.writer() as cur:
+            cur.execute(
+                """INSERT INTO rng_seeds (scope, seed) VALUES(?,?)""", (scope, seed)
+            )
+
+    def log(self, scope, seed):
+        """Queue a seed for the writer without waiting for it to commit."""
+        self.db.submit_write(self.insert, scope, seed)
+
+    def read(self, scope, limit=10):
+        with self.db.reader() as cur:
+            cur.execute(
+                RNG_SEEDS,
+                (scope, limit),
+            )
+            rows = cur.fetchall()
+        return rows
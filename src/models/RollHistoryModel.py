@@ -0,0 +1,115 @@
+from collections import Counter
+from models.Database import Database, writes
+from models.Queries import ROLL_FACES, ROLL_HISTORY, ROLL_STATS
+import json
+import threading
+import time
+
+FLUSH_SIZE = 100
+
+
+class RollHistory:
+    """
+    Buffered roll log with per-user, per-die running totals.
+
+    record() only appends to memory; flush() writes the buffered rolls and
+    folds them into roll_stats and roll_faces in a single transaction, so
+    stats are read from small aggregate tables instead of the whole log.
+    """
+
+    def __init__(self):
+        self.db = Database.get()
+        self._pending = []
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def record(self, user_id, channel_id, result, rolled_at=None):
+        dice = [[die.sides, die.faces, int(die.wild)] for die in result.dice]
+        entry = (
+            user_id,
+            channel_id,
+            result.source,
+            json.dumps(dice, separators=(",", ":")),
+            result.total,
+            rolled_at or time.time(),
+        )
+        with self._lock:
+            self._pending.append(entry)
+        return entry
+
+    @writes
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+
+        stats = {}
+        faces = Counter()
+        for user_id, _, _, dice, _, _ in pending:
+            for sides, rolled, _ in json.loads(dice):
+                rolls, total, aces = stats.get((user_id, sides), (0, 0, 0))
+                stats[user_id, sides] = (
+                    rolls + 1,
+                    total + sum(rolled),
+                    aces + (len(rolled) > 1),
+                )
+                faces[user_id, sides, rolled[0]] += 1
+
+        try:
+            with self.db.writer() as cur:
+                cur.executemany(
+                    """INSERT INTO roll_history (user_id, channel_id, expression, dice, total, rolled_at) VALUES(?,?,?,?,?,?)""",
+                    pending,
+                )
+                cur.executemany(
+                    """
+                    INSERT INTO roll_stats (user_id, sides, rolls, total, aces) VALUES(?,?,?,?,?)
+                    ON CONFLICT(user_id, sides) DO UPDATE SET
+                        rolls = rolls + excluded.rolls,
+                        total = total + excluded.total,
+                        aces = aces + excluded.aces
+                    """,
+                    [(*key, *value) for key, value in stats.items()],
+                )
+                cur.executemany(
+                    """
+                    INSERT INTO roll_faces (user_id, sides, face, count) VALUES(?,?,?,?)
+                    ON CONFLICT(user_id, sides, face) DO UPDATE SET count = count + excluded.count
+                    """,
+                    [(*key, count) for key, count in faces.items()],
+                )
+        except Exception:
+            # Keep the rolls for the next flush instead of dropping them.
+            with self._lock:
+                self._pending[:0] = pending
+            raise
+        return len(pending)
+
+    def read(self, channel_id, limit=10):
+        with self.db.reader() as cur:
+            cur.execute(
+                ROLL_HISTORY,
+                (channel_id, limit),
+            )
+            rows = cur.fetchall()
+        return rows[::-1]
+
+    def stats(self, user_id):
+        with self.db.reader() as cur:
+            cur.execute(
+                ROLL_STATS,
+                (user_id,),
+            )
+            rows = cur.fetchall()
+            cur.execute(
+                ROLL_FACES,
+                (user_id,),
+            )
+            faces = {}
+            for sides, face, count in cur.fetchall():
+                faces.setdefault(sides, []).append((face, count))
+        return [(sides, rolls, total, aces, faces.get(sides, [])) for sides, rolls, total, aces in rows]
@@ -0,0 +1,298 @@
+#----------------------------------------------------
+#           Hot Path Benchmarks
+#   Seeds a synthetic swade.db and times the dice,
+#   deck, character parsing and model CRUD paths
+#   without connecting to Discord. Prints JSON with
+#   ops/sec and p50/p99 latency per benchmark.
+#
+#   python3 tools/benchmark.py [--characters 100000]
+#       [--encounters 10000] [--iterations 2000]
+#       [--filter dice] [--db bench.db] [--output out.json]
+#----------------------------------------------------
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The cogs read their channel ids at import time.
+for variable in ("MAIN_CHANNEL_ID", "CHARACTER_CHANNEL_ID", "TRACKER_CHANNEL_ID"):
+    os.environ.setdefault(variable, "0")
+
+ATTRIBUTES = ("Agility", "Smarts", "Spirit", "Strength", "Vigor")
+SKILLS = ("Fighting", "Notice", "Shooting")
+DIE_SIZES = ("1d4", "1d6", "1d8", "1d10", "1d12+1")
+CHARACTERS_PER_PLAYER = 4
+ROSTER_CHARACTERS = 4
+ROSTER_MONSTERS = 6
+ITEM_COUNT = 200
+MONSTER_COUNT = 2000
+SEED = 20240601
+
+
+def character_key(index):
+    return index // CHARACTERS_PER_PLAYER + 1, f"Hero{index}"
+
+
+def seed_database(db, characters, encounters):
+    started = time.perf_counter()
+    with db.writer() as cur:
+        cur.execute("SELECT count(*) FROM characters")
+        if cur.fetchone()[0] >= characters:
+            return 0.0
+
+        rows, attributes, skills, inventory = [], [], [], []
+        for index in range(characters):
+            player_id, name = character_key(index)
+            rows.append((player_id, name, 3, 1_000_000))
+            for offset, trait in enumerate(ATTRIBUTES):
+                die = DIE_SIZES[(index + offset) % len(DIE_SIZES)]
+                attributes.append((player_id, name, trait, die))
+            for offset, skill in enumerate(SKILLS):
+                die = DIE_SIZES[(index + offset) % len(DIE_SIZES)]
+                skills.append((player_id, name, skill, die))
+            inventory.append((player_id, name, f"Item{index % ITEM_COUNT}", 1))
+        cur.executemany(
+            """INSERT INTO characters (user_id,name,health,money) VALUES(?,?,?,?)""",
+            rows,
+        )
+        cur.executemany(
+            """INSERT INTO character_attributes (user_id, character_name, name, value) VALUES(?,?,?,?)""",
+            attributes,
+        )
+        cur.executemany(
+            """INSERT INTO character_skills (user_id, character_name, name, value) VALUES(?,?,?,?)""",
+            skills,
+        )
+        cur.executemany(
+            """INSERT INTO character_inventory (user_id, character_name, name, quantity) VALUES(?,?,?,?)""",
+            inventory,
+        )
+
+        cur.executemany(
+            """INSERT INTO items (name,category,price) VALUES(?,?,?)""",
+            [(f"Item{index}", "Gear", 10 + index) for index in range(ITEM_COUNT)],
+        )
+        cur.executemany(
+            """INSERT INTO monsters (name,health,attributes,skills,equipment,money) VALUES(?,?,?,?,?,?)""",
+            [
+                (
+                    f"Monster{index}",
+                    1,
+                    "Agility:1d6, Strength:1d6, Vigor:1d6",
+                    "Fighting:1d6, Notice:1d4",
+                    "Club:1",
+                    0,
+                )
+                for index in range(MONSTER_COUNT)
+            ],
+        )
+
+        cur.executemany(
+            """INSERT INTO encounters (id, name) VALUES(?,?)""",
+            [(index, f"Encounter{index}") for index in range(1, encounters + 1)],
+        )
+        roster, mobs = [], []
+        for encounter_id in range(1, encounters + 1):
+            for slot in range(ROSTER_CHARACTERS):
+                index = (encounter_id * ROSTER_CHARACTERS + slot) % characters
+                roster.append((encounter_id, *character_key(index)))
+            for slot in range(ROSTER_MONSTERS):
+                monster_id = (encounter_id * ROSTER_MONSTERS + slot) % MONSTER_COUNT + 1
+                mobs.append((encounter_id, monster_id))
+        cur.executemany("""INSERT INTO encounter_characters VALUES(?,?,?)""", roster)
+        cur.executemany("""INSERT INTO encounter_monsters VALUES(?,?)""", mobs)
+    return time.perf_counter() - started
+
+
+def measure(fn, iterations):
+    timings = []
+    for index in range(iterations):
+        start = time.perf_counter_ns()
+        fn(index)
+        timings.append(time.perf_counter_ns() - start)
+
+    timings.sort()
+    count = len(timings)
+    return {
+        "iterations": count,
+        "ops_per_sec": round(count * 1e9 / max(sum(timings), 1), 1),
+        "p50_us": round(timings[count // 2] / 1000, 2),
+        "p99_us": round(timings[min(count - 1, int(count * 0.99))] / 1000, 2),
+    }
+
+
+def benchmarks(characters, encounters):
+    from cogs.Dice import Dice
+    from game.Deck import Deck, Player
+    from game.DiceEngine import compile_rolls
+    from game.GroupRoll import roll_group, trait_die
+    from game.Probability import odds
+    from game.RandomStreams import RandomStream
+    from models.CharacterModel import Character, parse_pairs, parse_quantities
+    from models.CharacterSheet import CharacterSheet
+    from models.EncounterCharModel import EncounterChar
+    from models.EncounterModel import Encounter
+    from models.EncounterMonModel import EncounterMon
+    from models.ItemModel import Item
+    from models.MoneyModel import Money
+    from models.MonsterModel import Monster
+
+    rng = RandomStream(SEED)
+    dice = Dice(None)
+    author = types.SimpleNamespace(mention="<@1>")
+    expressions = ("1d20", "2d6+3", "2d6-1 1d4+2", "d8w+1 tn4", "4d6kh3", "(1d6+2)+d4")
+    results = dice.roll_dice("2d6-1 d8w+1 tn4", rng)
+
+    deck = Deck(rng)
+    player = Player("Bench", 3)
+    cards = list(deck.cards)
+
+    def deal(_):
+        if not deck.cards:
+            deck.create_deck()
+            player.cards, player.card_values = [], []
+        deck.deal_card(player)
+
+    equipment = ",".join(f"Item{index}:{index % 3 + 1}" for index in range(10))
+    traits = ", ".join(f"{name}:{DIE_SIZES[i % 5]}" for i, name in enumerate(ATTRIBUTES))
+    goblin = (0, "Goblin", 1, traits, "Fighting:1d6", "", 0)
+    mob = [("Goblin", trait_die(goblin, "Fighting"))] * 30
+
+    character, money, item = Character(), Money(), Item()
+    encounter, roster, mobs, monster = Encounter(), EncounterChar(), EncounterMon(), Monster()
+
+    def key(index):
+        return character_key(index * 7919 % characters)
+
+    def new_character(index):
+        return (10_000_000 + index, f"Bench{index}")
+
+    def monster_id(index):
+        return MONSTER_COUNT + 1 + index
+
+    encounter_id = encounters + 1
+
+    return [
+        ("dice compile (cached)", lambda i: compile_rolls(expressions[i % len(expressions)])),
+        ("dice roll_dice", lambda i: dice.roll_dice(expressions[i % len(expressions)], rng)),
+        ("dice format_output", lambda i: dice.format_output(author, results)),
+        (
+            "dice odds (uncached)",
+            lambda i: odds.__wrapped__((4 + 2 * (i % 5),), 6, i % 5 - 2, 4),
+        ),
+        ("dice group roll x30", lambda i: roll_group(mob, 4, rng=rng)),
+        ("deck create_deck", lambda i: deck.create_deck()),
+        ("deck deal_card", deal),
+        ("deck get_card_value", lambda i: deck.get_card_value(cards[i % len(cards)])),
+        ("characters parse_quantities", lambda i: parse_quantities(equipment)),
+        ("characters parse_pairs", lambda i: parse_pairs(traits)),
+        (
+            "characters build sheet",
+            lambda i: CharacterSheet(
+                1, "Hero", 3, 0, parse_pairs(traits), (), parse_quantities(equipment)
+            ),
+        ),
+        (
+            "character insert",
+            lambda i: character.insert(
+                (*new_character(i), 3, 100),
+                parse_pairs(traits),
+                [("Fighting", "1d8")],
+                [("Item1", 1)],
+            ),
+        ),
+        ("character read (cached)", lambda i: character.read(1, "Hero0")),
+        (
+            "character read (uncached)",
+            lambda i: (character.cache.clear(), character.read(*key(i))),
+        ),
+        ("character read_all", lambda i: character.read_all(key(i)[0])),
+        (
+            "character update",
+            lambda i: character.update(*new_character(i), 3, 200, [("Agility", "1d8")]),
+        ),
+        ("character delete", lambda i: character.delete(*new_character(i))),
+        ("money read", lambda i: money.read(*key(i))),
+        ("money credit", lambda i: money.credit(*key(i), 5)),
+        ("money debit", lambda i: money.debit(*key(i), 5)),
+        ("money transfer", lambda i: money.transfer(key(i), key(i + 1), 1)),
+        ("item read", lambda i: item.read(f"Item{i % ITEM_COUNT}")),
+        ("item read_all", lambda i: item.read_all()),
+        ("item purchase", lambda i: item.purchase(*key(i), f"Item{i % ITEM_COUNT}", 1)),
+        ("item insert", lambda i: item.insert((f"BenchItem{i}", "Gear", 5))),
+        ("item delete", lambda i: item.delete(f"BenchItem{i}")),
+        ("encounter insert", lambda i: encounter.insert(f"Bench{i}")),
+        ("encounter read", lambda i: encounter.read(i % encounters + 1)),
+        ("encounter initiative", lambda i: encounter.initiative(i % encounters + 1)),
+        ("encounter characters read", lambda i: roster.read(i % encounters + 1)),
+        ("encounter characters insert", lambda i: roster.insert((encounter_id, *key(i)))),
+        ("encounter characters delete", lambda i: roster.delete((encounter_id, *key(i)))),
+        ("encounter monsters read", lambda i: mobs.read(i % encounters + 1)),
+        ("encounter monsters insert", lambda i: mobs.insert((encounter_id, i % MONSTER_COUNT + 1))),
+        ("encounter monsters delete", lambda i: mobs.delete((encounter_id, i % MONSTER_COUNT + 1))),
+        ("monster insert", lambda i: monster.insert((f"Bench{i}", 1, traits, "Fighting:1d6", "", 0))),
+        ("monster read", lambda i: monster.read(i % MONSTER_COUNT + 1)),
+        ("monster update", lambda i: monster.update(monster_id(i), (2, traits, "Fighting:1d8", "", 0))),
+        ("monster delete", lambda i: monster.delete(monster_id(i))),
+        ("encounter delete", lambda i: encounter.delete(encounter_id + 1 + i)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark swadeBot hot paths.")
+    parser.add_argument("--characters", type=int, default=100_000)
+    parser.add_argument("--encounters", type=int, default=10_000)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--filter", default="", help="Only run benchmarks containing this text.")
+    parser.add_argument("--db", help="Reuse a seeded database instead of a scratch one.")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DATABASE_PATH"] = args.db or os.path.join(directory, "bench.db")
+        return run(args)
+
+
+def run(args):
+    from models.Database import Database
+
+    # Keep migration messages out of the JSON report.
+    with contextlib.redirect_stdout(sys.stderr):
+        db = Database.get()
+    try:
+        seconds = seed_database(db, args.characters, args.encounters)
+        results = {}
+        for name, fn in benchmarks(args.characters, args.encounters):
+            if args.filter in name:
+                results[name] = measure(fn, args.iterations)
+        db.flush()
+    finally:
+        Database.close_all()
+
+    report = {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "characters": args.characters,
+        "encounters": args.encounters,
+        "seed_seconds": round(seconds, 2),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+#----------------------------------------------------
+#           Query Plan Checker
+#   Migrates a scratch copy of the schema and fails
+#   if a hot query falls back to a full table SCAN.
+#
+#   python3 tools/check_query_plans.py [path/to/swade.db]
+#----------------------------------------------------
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.Database import Database
+from models.Migrations import QueryPlanError, check_query_plans
+
+
+def main():
+    if len(sys.argv) > 1:
+        db = Database(sys.argv[1])
+        return run(db)
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = Database(os.path.join(directory, "swade.db"))
+        return run(db)
+
+
+def run(db):
+    try:
+        with db.reader() as cur:
+            check_query_plans(cur)
+    except QueryPlanError as e:
+        print(f"FAIL: {e}")
+        return 1
+    finally:
+        db.close()
+
+    print("All hot queries use an index.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())